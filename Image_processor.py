@@ -1,17 +1,23 @@
+import io
 import os
-import pytesseract
+import statistics
 import numpy as np
-import cv2
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import uuid
-from googletrans import Translator
+from typing import Dict, List, Optional, Union
 from models import Language, ImageContent, TranslatedContent
 from datetime import datetime
-from simple_lama_inpainting import SimpleLama
+from ocr import OCRAnalysis
+from translation import TranslationBackend, GoogleTranslateBackend
+from inpainting import InpaintSettings, inpaint
+from ocr_preprocess import OCRSettings, prepare_for_ocr, has_text_candidates
+from model_registry import MODEL_REGISTRY
+from text_layout import TextLayoutEngine, default_layout_engine
+from ocr_backends import OCRBackend, default_ocr_backend
+from image_cache import settings_key
 
-# Set TESSDATA_PREFIX and Tesseract command
-os.environ["TESSDATA_PREFIX"] = r"C:\Program Files\Tesseract-OCR\tessdata"
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+# An image path, or an image already decoded for this request
+ImageSource = Union[str, Image.Image]
 
 # Map Language enum to Tesseract language codes
 TESSERACT_LANGUAGE_MAP = {
@@ -24,25 +30,122 @@ TESSERACT_LANGUAGE_MAP = {
 }
 
 class ImageProcessor:
-    def __init__(self):
-        self.translator = Translator()
+    def __init__(self, load_inpainting_model: bool = True,
+                 translation_backend: Optional[TranslationBackend] = None,
+                 debug_mask_dir: Optional[str] = None,
+                 inpaint_settings: Optional[InpaintSettings] = None,
+                 layout_engine: Optional[TextLayoutEngine] = None,
+                 ocr_settings: Optional[OCRSettings] = None,
+                 ocr_backend: Optional[OCRBackend] = None):
+        self.translation_backend = translation_backend or GoogleTranslateBackend()
+        # When set, each inpainting mask is also written there under a unique name
+        self.debug_mask_dir = debug_mask_dir or os.getenv("DEBUG_MASK_DIR")
+        self.inpaint_settings = inpaint_settings or InpaintSettings.from_env()
+        self.ocr_settings = ocr_settings or OCRSettings.from_env()
+        # False when inpainting runs in worker processes that hold their own model.
+        # The model itself is loaded lazily through MODEL_REGISTRY on first use.
+        self.inpaints_in_process = load_inpainting_model
+        self._layout_engine = layout_engine
+        self._ocr_backend = ocr_backend
+
+    @property
+    def layout_engine(self) -> TextLayoutEngine:
+        # Shared by default, so every processor in the process reuses loaded fonts and layouts
+        if self._layout_engine is None:
+            self._layout_engine = default_layout_engine()
+        return self._layout_engine
+
+    @property
+    def ocr_backend(self) -> OCRBackend:
+        # Shared by default, so every processor in the process draws from one engine pool
+        if self._ocr_backend is None:
+            self._ocr_backend = default_ocr_backend()
+        return self._ocr_backend
+
+    def cache_settings(self) -> Dict[str, str]:
+        """
+        settings_key of the configuration each cached stage depends on: "ocr",
+        "inpaint" and "render". Each includes the stages before it, since e.g. a
+        different OCR pass changes the mask and the layout boxes too.
+        """
+        engine = self.layout_engine
+        ocr = settings_key(vars(self.ocr_settings), type(self.ocr_backend).__name__)
+        inpaint = settings_key(ocr, vars(self.inpaint_settings))
+        render = settings_key(inpaint, {
+            "min_size": engine.min_size,
+            "line_spacing": engine.line_spacing,
+            "language_families": engine.language_families,
+            "font_dir": engine.fonts.font_dir,
+            "family_paths": engine.fonts.family_paths,
+        })
+        return {"ocr": ocr, "inpaint": inpaint, "render": render}
+
+    @property
+    def simple_lama(self):
+        if not self.inpaints_in_process:
+            return None
+        return MODEL_REGISTRY.get_or_none("lama")
+
+    def load_image(self, image_path: str) -> Image.Image:
+        """
+        Decode the image once per request; OCR, masking and inpainting share the result.
+        """
         try:
-            import torch
-            self.simple_lama = SimpleLama(device="cpu")  # Force CPU usage
-            print("SimpleLaMa initialized successfully on CPU")
-            print("SimpleLaMa initialized successfully on CPU with PyTorch version:", torch.__version__)
+            with Image.open(image_path) as image:
+                return image.convert('RGB')
         except Exception as e:
-            print(f"Failed to initialize SimpleLaMa: {e}")
-            self.simple_lama = None
+            raise Exception(f"Error loading image: {e}")
 
-    def extract_text(self, image_path: str, source_language: Language) -> ImageContent:
+    def decode_image(self, data: bytes) -> Image.Image:
+        """
+        Decode image bytes received in a message or fetched from an artifact store.
+        """
         try:
-            image = Image.open(image_path)
+            with Image.open(io.BytesIO(data)) as image:
+                return image.convert('RGB')
+        except Exception as e:
+            raise Exception(f"Error loading image: {e}")
+
+    def encode_png(self, image: Image.Image) -> bytes:
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def _as_image(self, image: ImageSource) -> Image.Image:
+        return image if isinstance(image, Image.Image) else self.load_image(image)
+
+    def analyze_image(self, image: ImageSource, source_language: Language) -> OCRAnalysis:
+        """
+        Run Tesseract once over the image and return words, boxes and confidences.
+
+        Tesseract sees a grayscale, binarized copy resized to the configured long
+        edge; boxes are returned in the original image's coordinates. Images with
+        nothing text-like in them skip Tesseract and get an empty analysis.
+        """
+        try:
+            image = self._as_image(image)
             tesseract_lang = TESSERACT_LANGUAGE_MAP.get(source_language, source_language.value)
-            text = pytesseract.image_to_string(image, lang=tesseract_lang)
-            image_id = str(uuid.uuid4())
+            settings = self.ocr_settings
+            if settings.text_check and not has_text_candidates(image, settings.target_long_edge):
+                return OCRAnalysis(width=image.width, height=image.height, language=tesseract_lang)
+            ocr_image, _ = prepare_for_ocr(image, settings)
+            details = self.ocr_backend.image_to_data(ocr_image, tesseract_lang)
+            analysis = OCRAnalysis.from_tesseract_data(
+                details, ocr_image.shape[1], ocr_image.shape[0], tesseract_lang
+            )
+            return analysis.rescaled(image.width, image.height)
+        except Exception as e:
+            raise Exception(f"Error analyzing image: {e}")
+
+    def extract_text(self, image_path: str, source_language: Language,
+                     analysis: Optional[OCRAnalysis] = None,
+                     image_id: Optional[str] = None) -> ImageContent:
+        try:
+            if analysis is None:
+                analysis = self.analyze_image(image_path, source_language)
+            image_id = image_id or str(uuid.uuid4())
             timestamp = datetime.now().isoformat()
-            return ImageContent.create(image_id, image_path, source_language, extracted_text=text, timestamp=timestamp)
+            return ImageContent.create(image_id, image_path, source_language, extracted_text=analysis.text, timestamp=timestamp)
         except Exception as e:
             raise Exception(f"Error extracting text: {e}")
 
@@ -50,69 +153,113 @@ class ImageProcessor:
         try:
             if not text.strip():
                 return ""
-            translation = self.translator.translate(text, src=source_language.value, dest=target_language.value)
-            return translation.text
+            return self.translation_backend.translate(text, source_language, target_language)
+        except Exception as e:
+            raise Exception(f"Error translating text to {target_language.value}: {e}")
+
+    def translate_segments(self, segments: List[str], source_language: Language,
+                           target_language: Language) -> List[str]:
+        try:
+            return self.translation_backend.translate_segments(segments, source_language, target_language)
         except Exception as e:
             raise Exception(f"Error translating text to {target_language.value}: {e}")
 
-    def replace_text_in_image(self, original_image_path: str, original_text: str, 
-                             translated_text: str, font_style: dict) -> str:
+    def build_mask(self, analysis: OCRAnalysis) -> np.ndarray:
+        """
+        Single-channel mask (255 = inpaint) covering the confidently detected words.
+        """
+        # Create a blank mask (same size as image, single channel)
+        mask = np.zeros((analysis.height, analysis.width), dtype=np.uint8)
+
+        # Iterate through detected text and draw bounding boxes on the mask
+        for word in analysis.confident_words(20):  # Only consider confident detections
+            x, y, w, h = word.left, word.top, word.width, word.height
+            # Fill the rectangle, edges inclusive (white = 255 for inpainting)
+            mask[max(0, y):y + h + 1, max(0, x):x + w + 1] = 255
+        return mask
+
+    def inpaint_background(self, image: ImageSource,
+                           analysis: Optional[OCRAnalysis] = None) -> Image.Image:
+        """
+        Remove the detected text from the image. The result does not depend on the
+        target language, so it is computed once per image and shared by every render.
+        """
         try:
-            # Load the image using PIL and convert to RGB
-            image_pil = Image.open(original_image_path).convert('RGB')
-            image_rgb = np.array(image_pil)  # Convert to NumPy array for Tesseract and OpenCV
-
-            # Use Tesseract to detect text bounding boxes
-            custom_config = r'--oem 3 --psm 6'
-            details = pytesseract.image_to_data(image_rgb, output_type=pytesseract.Output.DICT)
-
-            # Create a blank mask (same size as image, single channel)
-            mask = np.zeros((image_rgb.shape[0], image_rgb.shape[1]), dtype=np.uint8)
-
-            # Iterate through detected text and draw bounding boxes on the mask
-            for i in range(len(details['text'])):
-                if int(float(details['conf'][i])) > 20:  # Only consider confident detections
-                    x, y, w, h = (
-                        details['left'][i],
-                        details['top'][i],
-                        details['width'][i],
-                        details['height'][i]
-                    )
-                    # Draw a filled rectangle on the mask (white = 255 for inpainting)
-                    cv2.rectangle(mask, (x, y), (x + w, y + h), 255, -1)
-
-            # Save the mask for inpainting
-            mask_pil = Image.fromarray(mask)
-            mask_pil.save('mask.png')
-
-            # Perform inpainting using SimpleLaMa if available
-            if self.simple_lama is not None:
-                mask_pil = Image.open('mask.png').convert('L')  # Ensure mask is single-channel
-                inpainted_image = self.simple_lama(image_pil, mask_pil)
+            image_pil = self._as_image(image)
+
+            # Reuse the request's OCR pass for text bounding boxes
+            if analysis is None:
+                analysis = self.analyze_image(image_pil, Language.ENGLISH)
+
+            # The mask stays in memory; it is only written out as a debug artifact
+            mask_pil = Image.fromarray(self.build_mask(analysis), mode='L')
+            if self.debug_mask_dir:
+                os.makedirs(self.debug_mask_dir, exist_ok=True)
+                mask_pil.save(os.path.join(self.debug_mask_dir, f"mask_{uuid.uuid4()}.png"))
+
+            # Perform inpainting using SimpleLaMa if available, on padded text regions
+            # or the full frame depending on INPAINT_MODE and mask coverage
+            simple_lama = self.simple_lama
+            if simple_lama is not None:
+                settings = self.inpaint_settings
+                inpainted_image = inpaint(
+                    simple_lama, image_pil, mask_pil, mode=settings.mode,
+                    padding=settings.padding, full_frame_coverage=settings.full_frame_coverage
+                )
                 print("Inpainting completed successfully")
             else:
+                status = MODEL_REGISTRY.status()["lama"]
+                print(f"Inpainting skipped, SimpleLaMa is {status['state']}: {status['error']}")
                 inpainted_image = image_pil  # Fallback to original image if inpainting fails
+            return inpainted_image
 
-            # Overlay the translated text on the inpainted image
-            draw = ImageDraw.Draw(inpainted_image)
-            font_path = font_style.get("family", "arial.ttf")
-            font = ImageFont.truetype(font_path, int(font_style.get("size", 24)))
-            color = font_style.get("color", "#000000")
+        except Exception as e:
+            raise Exception(f"Error inpainting image: {e}")
 
-            # Find a position for the translated text (using the first detected text's position if available)
-            text_position = (50, 50)  # Default position
-            for i in range(len(details['text'])):
-                if int(float(details['conf'][i])) > 0:
-                    text_position = (details['left'][i], details['top'][i])
-                    break
+    @staticmethod
+    def _block_text_height(block) -> int:
+        return int(statistics.median(word.height for line in block.lines for word in line.words))
 
-            # Draw the translated text
-            draw.text(text_position, translated_text, font=font, fill=color)
+    def render_translation(self, background: Image.Image, analysis: OCRAnalysis,
+                           translated_text: str, font_style: dict,
+                           segments: Optional[List[str]] = None,
+                           target_language: Optional[Language] = None) -> Image.Image:
+        """
+        Draw the translated text onto a copy of the inpainted background.
+
+        Given one translated segment per OCR block, each segment is wrapped and
+        sized to fit its block's box. Otherwise the whole text is wrapped from
+        the first word's position to the image edges.
+        """
+        try:
+            # Overlay the translated text on a copy so the background can be reused
+            edited_image = background.copy()
+            draw = ImageDraw.Draw(edited_image)
+            engine = self.layout_engine
+            family = engine.family_for(
+                font_style.get("family", "arial.ttf"), target_language.value if target_language else None
+            )
+            size = int(font_style.get("size", 24))
+            color = font_style.get("color", "#000000")
+
+            blocks = analysis.blocks
+            if segments is not None and blocks and len(segments) == len(blocks):
+                # Start from the original text's height so headlines stay large
+                placements = [
+                    (segment, block.box, max(size, self._block_text_height(block)))
+                    for segment, block in zip(segments, blocks) if segment.strip()
+                ]
+            else:
+                # Find a position for the translated text (using the first detected text's position if available)
+                left, top = analysis.first_word_position(0) or (50, 50)  # Default position
+                margin = 10
+                box = (left, top, max(left + 1, edited_image.width - margin), max(top + 1, edited_image.height - margin))
+                placements = [(translated_text, box, size)] if translated_text.strip() else []
 
-            # Save the final image
-            output_path = f"edited_{uuid.uuid4()}.png"
-            inpainted_image.save(output_path)
-            return output_path
+            for text, box, max_size in placements:
+                layout = engine.fit(text, box, family, max_size)
+                engine.draw(draw, layout, box, family, color)
+            return edited_image
 
         except Exception as e:
-            raise Exception(f"Error replacing text: {e}")
\ No newline at end of file
+            raise Exception(f"Error rendering text: {e}")
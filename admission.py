@@ -0,0 +1,326 @@
+import os
+import json
+import math
+import time
+import asyncio
+import hashlib
+import functools
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+from models import Priority
+from metrics import METRICS
+
+WaiterId = Hashable  # e.g. (sender, request_id)
+
+
+class AdmissionRejectedError(Exception):
+    """
+    Raised when a request is turned away because the queue is full.
+    """
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RequestCancelledError(Exception):
+    """
+    Raised to a waiter whose request was cancelled.
+    """
+
+
+class AdmissionConfig:
+    """
+    Admission settings, read from the environment like WorkerConfig.
+
+    max_running: jobs processed at once; the rest wait in the queue.
+    max_queued: jobs waiting across all senders before new ones are rejected.
+    max_queued_per_sender: a sender's share of the queue, so one client
+        cannot crowd out the others.
+    bulk_queue_share: bulk jobs are only admitted while the queue is below
+        this fraction of max_queued, keeping room for interactive work.
+    bulk_every: every bulk_every-th dispatch goes to bulk work when any is
+        waiting, so a steady interactive stream does not starve it.
+    """
+    def __init__(self, max_running: int = 4, max_queued: int = 64, max_queued_per_sender: int = 16,
+                 bulk_queue_share: float = 0.75, bulk_every: int = 4):
+        self.max_running = max(1, max_running)
+        self.max_queued = max_queued
+        self.max_queued_per_sender = max_queued_per_sender
+        self.bulk_queue_share = bulk_queue_share
+        self.bulk_every = max(1, bulk_every)
+
+    @classmethod
+    def from_env(cls) -> "AdmissionConfig":
+        return cls(
+            max_running=int(os.getenv("ADMISSION_CONCURRENCY", "4")),
+            max_queued=int(os.getenv("ADMISSION_QUEUE_DEPTH", "64")),
+            max_queued_per_sender=int(os.getenv("ADMISSION_SENDER_QUEUE_DEPTH", "16")),
+            bulk_queue_share=float(os.getenv("ADMISSION_BULK_QUEUE_SHARE", "0.75")),
+            bulk_every=int(os.getenv("ADMISSION_BULK_EVERY", "4")),
+        )
+
+
+def request_fingerprint(request, exclude=("request_id", "priority")) -> str:
+    """
+    Hash of a request's fields other than `exclude`; identical work gets the same fingerprint.
+    """
+    payload = json.dumps(request.dict(exclude=set(exclude)), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Job:
+    def __init__(self, key: Optional[str], sender: str, priority: Priority,
+                 run: Callable[[], Awaitable[Any]]):
+        self.key = key
+        self.sender = sender
+        self.priority = priority
+        self.run = run
+        self.waiters: Dict[WaiterId, asyncio.Future] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.enqueued_at = time.perf_counter()
+
+
+class AdmissionController:
+    """
+    Bounded, prioritized queue in front of the image pipeline.
+
+    Each priority class keeps one FIFO per sender and serves senders round-robin,
+    so a client with a burst of requests waits behind its own jobs rather than
+    everyone else's. Interactive jobs go first, except that every bulk_every-th
+    dispatch is given to bulk work. When the queue, or the sender's share of
+    it, is full, submit() raises AdmissionRejectedError with a retry-after
+    estimate from the queue length and recent job durations, or, with
+    wait=True, holds the caller until a queued job leaves the queue.
+
+    Requests with the same fingerprint while one is queued or running attach to
+    that job instead of adding another. A waiter can be cancelled; the job
+    itself is dropped (or its task cancelled) once no waiter is left.
+    """
+    def __init__(self, config: Optional[AdmissionConfig] = None):
+        self.config = config or AdmissionConfig.from_env()
+        self._queues: Dict[Priority, "OrderedDict[str, Deque[_Job]]"] = {
+            Priority.INTERACTIVE: OrderedDict(), Priority.BULK: OrderedDict()
+        }
+        self._inflight: Dict[str, _Job] = {}
+        self._jobs_by_waiter: Dict[WaiterId, _Job] = {}
+        self._queued_by_sender: Dict[str, int] = {}
+        self._queued = 0
+        self._running = 0
+        self._dispatches = 0
+        self._job_seconds = 5.0  # Moving average of job durations, for retry-after hints
+        self._capacity_waiters: List[asyncio.Future] = []
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "queued": self._queued,
+            "running": self._running,
+            "queued_interactive": sum(map(len, self._queues[Priority.INTERACTIVE].values())),
+            "queued_bulk": sum(map(len, self._queues[Priority.BULK].values())),
+        }
+
+    def retry_after(self) -> float:
+        """
+        Seconds until the current backlog has likely drained enough to take new work.
+        """
+        backlog = (self._queued + self._running) / self.config.max_running
+        return float(max(1, math.ceil(backlog * self._job_seconds)))
+
+    def _capacity_problem(self, sender: str, priority: Priority) -> Optional[Tuple[str, str]]:
+        limit = self.config.max_queued
+        if priority == Priority.BULK:
+            limit = int(limit * self.config.bulk_queue_share)
+        if self._queued >= limit:
+            return "queue_full", f"Queue full ({self._queued}/{limit} {priority.value} jobs waiting)"
+        if self._queued_by_sender.get(sender, 0) >= self.config.max_queued_per_sender:
+            return "sender_share", (
+                f"Too many queued requests from this sender "
+                f"({self._queued_by_sender[sender]}/{self.config.max_queued_per_sender})"
+            )
+        return None
+
+    def _check_capacity(self, sender: str, priority: Priority):
+        problem = self._capacity_problem(sender, priority)
+        if problem is None:
+            return
+        reason, message = problem
+        METRICS.inc("admission_rejected_total", priority=priority.value, reason=reason)
+        retry_after = self.retry_after()
+        raise AdmissionRejectedError(f"{message}; retry after {retry_after:g}s", retry_after)
+
+    async def submit(self, run: Callable[[], Awaitable[Any]], sender: str = "",
+                     priority: Priority = Priority.INTERACTIVE, key: Optional[str] = None,
+                     waiter_id: Optional[WaiterId] = None, wait: bool = False) -> Any:
+        """
+        Queue run() and return its result once it has been dispatched and finished.
+
+        With a key, a request identical to one already queued or running shares
+        its result. waiter_id names this caller for cancel(); it must be unique
+        among current waiters. With wait, a full queue makes the caller wait for
+        room instead of raising AdmissionRejectedError, for callers such as
+        batches that would otherwise have to retry.
+        """
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        waiter_id = waiter_id if waiter_id is not None else object()
+        if waiter_id in self._jobs_by_waiter:
+            raise Exception(f"Request {waiter_id} is already in progress")
+        job = self._inflight.get(key) if key is not None else None
+        if job is None and wait and self._capacity_problem(sender, priority) is not None:
+            METRICS.inc("admission_backpressure_total", priority=priority.value)
+            started = time.perf_counter()
+            while job is None and self._capacity_problem(sender, priority) is not None:
+                capacity = loop.create_future()
+                self._capacity_waiters.append(capacity)
+                await capacity
+                job = self._inflight.get(key) if key is not None else None
+            METRICS.observe("admission_backpressure_seconds", time.perf_counter() - started,
+                            priority=priority.value)
+        if job is not None:
+            METRICS.inc("admission_deduplicated_total", priority=priority.value)
+            if priority == Priority.INTERACTIVE and job.priority == Priority.BULK and job.task is None:
+                self._promote(job)
+        else:
+            self._check_capacity(sender, priority)
+            job = _Job(key, sender, priority, run)
+            self._enqueue(job)
+            if key is not None:
+                self._inflight[key] = job
+        job.waiters[waiter_id] = waiter
+        self._jobs_by_waiter[waiter_id] = job
+        self._dispatch()
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            self._detach(job, waiter_id)
+            raise
+        finally:
+            self._jobs_by_waiter.pop(waiter_id, None)
+
+    def cancel(self, waiter_id: WaiterId) -> bool:
+        """
+        Cancel one waiter's request. Its submit() raises RequestCancelledError.
+        False when no such request is queued or running.
+        """
+        job = self._jobs_by_waiter.get(waiter_id)
+        if job is None:
+            return False
+        waiter = job.waiters.get(waiter_id)
+        if waiter is None or waiter.done():
+            return False
+        waiter.set_exception(RequestCancelledError("Request cancelled"))
+        self._detach(job, waiter_id)
+        METRICS.inc("admission_cancelled_total", priority=job.priority.value)
+        return True
+
+    def _detach(self, job: _Job, waiter_id: WaiterId):
+        job.waiters.pop(waiter_id, None)
+        if job.waiters:
+            return
+        if job.task is None:
+            self._dequeue(job)
+        elif not job.task.done():
+            job.task.cancel()
+
+    def _enqueue(self, job: _Job):
+        self._queues[job.priority].setdefault(job.sender, deque()).append(job)
+        self._queued += 1
+        self._queued_by_sender[job.sender] = self._queued_by_sender.get(job.sender, 0) + 1
+
+    def _dequeue(self, job: _Job):
+        senders = self._queues[job.priority]
+        jobs = senders.get(job.sender)
+        if jobs is None or job not in jobs:
+            return
+        jobs.remove(job)
+        if not jobs:
+            del senders[job.sender]
+        self._forget_queued(job)
+        self._forget_inflight(job)
+
+    def _forget_queued(self, job: _Job):
+        self._queued -= 1
+        remaining = self._queued_by_sender[job.sender] - 1
+        if remaining:
+            self._queued_by_sender[job.sender] = remaining
+        else:
+            del self._queued_by_sender[job.sender]
+        # Wake callers waiting for room; each checks capacity again in submit()
+        waiters, self._capacity_waiters = self._capacity_waiters, []
+        for capacity in waiters:
+            if not capacity.done():
+                capacity.set_result(None)
+
+    def _promote(self, job: _Job):
+        # An interactive caller is now waiting on queued bulk work; move it up
+        senders = self._queues[job.priority]
+        jobs = senders[job.sender]
+        jobs.remove(job)
+        if not jobs:
+            del senders[job.sender]
+        job.priority = Priority.INTERACTIVE
+        self._queues[job.priority].setdefault(job.sender, deque()).append(job)
+
+    def _next_job(self) -> Optional[_Job]:
+        interactive, bulk = self._queues[Priority.INTERACTIVE], self._queues[Priority.BULK]
+        self._dispatches += 1
+        if bulk and (not interactive or self._dispatches % self.config.bulk_every == 0):
+            senders = bulk
+        elif interactive:
+            senders = interactive
+        else:
+            return None
+        # Round-robin: take the first sender's oldest job and move the sender to the back
+        sender, jobs = next(iter(senders.items()))
+        job = jobs.popleft()
+        if jobs:
+            senders.move_to_end(sender)
+        else:
+            del senders[sender]
+        self._forget_queued(job)
+        return job
+
+    def _dispatch(self):
+        while self._running < self.config.max_running:
+            job = self._next_job()
+            if job is None:
+                return
+            self._running += 1
+            METRICS.observe("admission_queue_wait_seconds", time.perf_counter() - job.enqueued_at,
+                            priority=job.priority.value)
+            job.task = asyncio.ensure_future(self._run_job(job))
+            # A callback rather than a finally, so it also runs for a task cancelled before it started
+            job.task.add_done_callback(functools.partial(self._job_done, job, time.perf_counter()))
+
+    def _forget_inflight(self, job: _Job):
+        if job.key is not None and self._inflight.get(job.key) is job:
+            del self._inflight[job.key]
+
+    async def _run_job(self, job: _Job):
+        try:
+            result = await job.run()
+        except Exception as e:
+            self._forget_inflight(job)
+            for waiter in job.waiters.values():
+                if not waiter.done():
+                    waiter.set_exception(e)
+        else:
+            # Before waking waiters, so a request they send next starts a new job
+            self._forget_inflight(job)
+            for waiter in job.waiters.values():
+                if not waiter.done():
+                    waiter.set_result(result)
+
+    def _job_done(self, job: _Job, started: float, task: asyncio.Task):
+        if not task.cancelled():
+            self._job_seconds = 0.8 * self._job_seconds + 0.2 * (time.perf_counter() - started)
+        self._running -= 1
+        self._forget_inflight(job)
+        self._dispatch()
@@ -0,0 +1,363 @@
+import os
+import base64
+import hashlib
+import tempfile
+import threading
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from typing import BinaryIO, Iterator, Optional
+
+ARTIFACT_SCHEME = "artifact://"
+DEFAULT_CHUNK_SIZE = 8 << 20  # 8 MiB, above the S3 multipart minimum of 5 MiB
+
+
+def content_key(digest: str, suffix: str = "") -> str:
+    """
+    Storage key for content with the given SHA-256 hex digest, sharded by prefix.
+    """
+    return f"{digest[:2]}/{digest}{suffix}"
+
+
+class ArtifactStore:
+    """
+    Content-addressed storage for input images and rendered outputs.
+
+    Keys are derived from the SHA-256 of the content, so storing the same bytes
+    twice is a no-op and keys can be shared between the client and the agent
+    without a common filesystem. Data moves in chunks of chunk_size bytes.
+    """
+    chunk_size = DEFAULT_CHUNK_SIZE
+
+    def put_stream(self, stream: BinaryIO, suffix: str = "") -> str:
+        raise NotImplementedError
+
+    def open_chunks(self, key: str) -> Iterator[bytes]:
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def size(self, key: str) -> int:
+        raise NotImplementedError
+
+    def read_range(self, key: str, offset: int, length: int) -> bytes:
+        """
+        Up to length bytes of the artifact from offset, for fetching it in parts.
+        """
+        raise NotImplementedError
+
+    def url(self, key: str) -> str:
+        return f"{ARTIFACT_SCHEME}{key}"
+
+    def key_for_url(self, url: str) -> Optional[str]:
+        """
+        Key of the artifact in this store that url (as returned by url()) names, else None.
+        """
+        if url.startswith(ARTIFACT_SCHEME):
+            return url[len(ARTIFACT_SCHEME):]
+        return None
+
+    def local_path(self, key: str) -> Optional[str]:
+        """
+        Filesystem path of the artifact, for backends that have one.
+        """
+        return None
+
+    def put_bytes(self, data: bytes, suffix: str = "") -> str:
+        key = content_key(hashlib.sha256(data).hexdigest(), suffix)
+        if not self.exists(key):
+            self._write(key, (data[i:i + self.chunk_size] for i in range(0, max(1, len(data)), self.chunk_size)))
+        return key
+
+    def put_file(self, path: str, suffix: Optional[str] = None) -> str:
+        with open(path, "rb") as f:
+            return self.put_stream(f, os.path.splitext(path)[1] if suffix is None else suffix)
+
+    def get_bytes(self, key: str) -> bytes:
+        return b"".join(self.open_chunks(key))
+
+    def download(self, key: str, path: str):
+        with open(path, "wb") as f:
+            for chunk in self.open_chunks(key):
+                f.write(chunk)
+
+    def _write(self, key: str, chunks: Iterator[bytes]):
+        raise NotImplementedError
+
+
+class LocalArtifactStore(ArtifactStore):
+    """
+    Artifacts as files under a single directory, written atomically.
+
+    With max_bytes, the directory is kept under that size by deleting the least
+    recently written or read artifacts, like ImageResultCache. An evicted render
+    is a cache miss and is drawn again; an evicted input upload has to be sent
+    again by the client.
+    """
+    def __init__(self, directory: str = "artifacts", chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 max_bytes: Optional[int] = None):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest first
+        self._total_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".part"):
+                    continue
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                key = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                try:
+                    self.local_path(key)
+                except ValueError:
+                    continue  # Not a file this store wrote
+                files.append((stat.st_mtime, key, stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def _touch(self, key: str):
+        with self._lock:
+            if key not in self._entries:
+                return
+            self._entries.move_to_end(key)
+        try:
+            os.utime(self.local_path(key))  # Keeps the order across restarts
+        except OSError:
+            pass
+
+    def _add(self, key: str):
+        size = os.path.getsize(self.local_path(key))
+        evicted = []
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            while self.max_bytes is not None and self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, old_size = self._entries.popitem(last=False)
+                self._total_bytes -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self.local_path(old_key))
+            except OSError:
+                pass
+
+    def local_path(self, key: str) -> str:
+        # Keys can come from clients, so keep them inside the directory
+        parts = key.split("/")
+        if any(part in ("", ".", "..") or "\\" in part or ":" in part for part in parts):
+            raise ValueError(f"Invalid artifact key: {key!r}")
+        return os.path.join(self.directory, *parts)
+
+    def exists(self, key: str) -> bool:
+        if not os.path.exists(self.local_path(key)):
+            return False
+        self._touch(key)
+        return True
+
+    def put_stream(self, stream: BinaryIO, suffix: str = "") -> str:
+        # Hash while copying to a temporary file, then move it under its content key
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in iter(lambda: stream.read(self.chunk_size), b""):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            key = content_key(digest.hexdigest(), suffix)
+            path = self.local_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+            self._add(key)
+            return key
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _write(self, key: str, chunks: Iterator[bytes]):
+        path = self.local_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        with os.fdopen(fd, "wb") as tmp:
+            for chunk in chunks:
+                tmp.write(chunk)
+        os.replace(tmp_path, path)
+        self._add(key)
+
+    def open_chunks(self, key: str) -> Iterator[bytes]:
+        self._touch(key)
+        with open(self.local_path(key), "rb") as f:
+            yield from iter(lambda: f.read(self.chunk_size), b"")
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self.local_path(key))
+
+    def read_range(self, key: str, offset: int, length: int) -> bytes:
+        if offset == 0:
+            self._touch(key)
+        with open(self.local_path(key), "rb") as f:
+            f.seek(offset)
+            return f.read(max(0, length))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+        if os.path.exists(self.local_path(key)):
+            os.remove(self.local_path(key))
+
+
+class S3ArtifactStore(ArtifactStore):
+    """
+    Artifacts in an S3-compatible bucket (AWS, MinIO, or a local stand-in via
+    endpoint_url). Large objects use multipart uploads and ranged downloads of
+    chunk_size bytes. Pass `client` to use a preconfigured or fake boto3-style client.
+    """
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, client=None):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.endpoint_url = endpoint_url
+        self.chunk_size = chunk_size
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client("s3", endpoint_url=self.endpoint_url)
+        return self._client
+
+    def _object_key(self, key: str) -> str:
+        return self.prefix + key
+
+    def url(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self._object_key(key)}"
+
+    def key_for_url(self, url: str) -> Optional[str]:
+        own_prefix = f"s3://{self.bucket}/{self.prefix}"
+        if url.startswith(own_prefix):
+            return url[len(own_prefix):]
+        return super().key_for_url(url)
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except Exception:
+            return False
+
+    def put_stream(self, stream: BinaryIO, suffix: str = "") -> str:
+        # The key depends on the full content, so stage it to disk while hashing first
+        digest = hashlib.sha256()
+        with tempfile.TemporaryFile() as staged:
+            for chunk in iter(lambda: stream.read(self.chunk_size), b""):
+                digest.update(chunk)
+                staged.write(chunk)
+            key = content_key(digest.hexdigest(), suffix)
+            if not self.exists(key):
+                staged.seek(0)
+                self._write(key, iter(lambda: staged.read(self.chunk_size), b""))
+        return key
+
+    def _write(self, key: str, chunks: Iterator[bytes]):
+        object_key = self._object_key(key)
+        first = next(chunks, b"")
+        second = next(chunks, None)
+        if second is None:
+            self.client.put_object(Bucket=self.bucket, Key=object_key, Body=first)
+            return
+        upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=object_key)["UploadId"]
+        try:
+            parts = []
+            for number, chunk in enumerate([first, second], start=1):
+                parts.append(self._upload_part(object_key, upload_id, number, chunk))
+            for number, chunk in enumerate(chunks, start=3):
+                parts.append(self._upload_part(object_key, upload_id, number, chunk))
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=object_key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+            )
+        except Exception:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=object_key, UploadId=upload_id)
+            raise
+
+    def _upload_part(self, object_key: str, upload_id: str, number: int, chunk: bytes) -> dict:
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=object_key, UploadId=upload_id, PartNumber=number, Body=chunk
+        )
+        return {"PartNumber": number, "ETag": response["ETag"]}
+
+    def open_chunks(self, key: str) -> Iterator[bytes]:
+        object_key = self._object_key(key)
+        size = self.client.head_object(Bucket=self.bucket, Key=object_key)["ContentLength"]
+        for start in range(0, size, self.chunk_size):
+            end = min(size, start + self.chunk_size) - 1
+            response = self.client.get_object(Bucket=self.bucket, Key=object_key, Range=f"bytes={start}-{end}")
+            yield response["Body"].read()
+
+    def size(self, key: str) -> int:
+        return self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))["ContentLength"]
+
+    def read_range(self, key: str, offset: int, length: int) -> bytes:
+        if length <= 0:
+            return b""
+        response = self.client.get_object(
+            Bucket=self.bucket, Key=self._object_key(key), Range=f"bytes={offset}-{offset + length - 1}"
+        )
+        return response["Body"].read()
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+
+def artifact_store_from_env() -> ArtifactStore:
+    chunk_size = int(os.getenv("ARTIFACT_CHUNK_SIZE", str(DEFAULT_CHUNK_SIZE)))
+    if os.getenv("ARTIFACT_STORE", "local") == "s3":
+        return S3ArtifactStore(
+            bucket=os.getenv("ARTIFACT_S3_BUCKET", "content-translator"),
+            prefix=os.getenv("ARTIFACT_S3_PREFIX", ""),
+            endpoint_url=os.getenv("ARTIFACT_S3_ENDPOINT_URL") or None,
+            chunk_size=chunk_size,
+        )
+    max_bytes = int(os.getenv("ARTIFACT_MAX_BYTES", str(10 << 30)))  # 0 disables the budget
+    return LocalArtifactStore(
+        os.getenv("ARTIFACT_DIR", "artifacts"), chunk_size=chunk_size, max_bytes=max_bytes or None
+    )
+
+
+def read_image_source(store: ArtifactStore, image_path: Optional[str] = None,
+                      image_bytes: Optional[str] = None, image_url: Optional[str] = None) -> bytes:
+    """
+    Fetch the raw bytes of a request's image: inline base64, a URL of an
+    artifact in the store (artifact://, or s3:// for the S3 backend) or an
+    http(s) URL, or a local path, in that order of preference.
+    """
+    if image_bytes:
+        return base64.b64decode(image_bytes)
+    if image_url:
+        key = store.key_for_url(image_url)
+        if key is not None:
+            return store.get_bytes(key)
+        # urlopen would also read file:// and other local schemes
+        if urllib.parse.urlsplit(image_url).scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported image_url (expected http(s) or an artifact URL): {image_url}")
+        with urllib.request.urlopen(image_url, timeout=60) as response:
+            return b"".join(iter(lambda: response.read(store.chunk_size), b""))
+    if image_path:
+        with open(image_path, "rb") as f:
+            return f.read()
+    raise ValueError("Request has no image_path, image_bytes or image_url")
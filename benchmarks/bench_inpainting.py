@@ -0,0 +1,124 @@
+"""
+Compare full-frame and region-cropped inpainting on synthetic high-resolution images.
+
+Each image is a smooth background with a few lines of text drawn on it, so the
+clean background is known and quality can be scored as PSNR over the masked
+pixels. Every (size, mode) pair runs in a fresh process so peak RSS is comparable.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_inpainting --model lama --sizes 1080 2160 --output inpaint.json
+The default model is OpenCV's Telea inpainting, which runs without torch.
+"""
+import json
+import time
+import argparse
+import statistics
+import multiprocessing
+import numpy as np
+import cv2
+from PIL import Image, ImageDraw, ImageFont
+from inpainting import inpaint, mask_regions, region_coverage
+from benchmarks.memory import peak_rss_mb, round_mb
+
+
+class OpenCVInpainter:
+    """
+    Torch-free stand-in with the SimpleLama call signature.
+    """
+    def __call__(self, image: Image.Image, mask: Image.Image) -> Image.Image:
+        result = cv2.inpaint(np.array(image), np.array(mask), 3, cv2.INPAINT_TELEA)
+        return Image.fromarray(result)
+
+
+def load_model(name: str):
+    if name == "lama":
+        from simple_lama_inpainting import SimpleLama
+        return SimpleLama(device="cpu")
+    return OpenCVInpainter()
+
+
+def make_sample(long_edge: int, lines: int, seed: int = 0):
+    """
+    Return (clean background, image with text, mask) for a square-ish 4:5 frame.
+    """
+    rng = np.random.default_rng(seed)
+    width, height = int(long_edge * 0.8), long_edge
+    y, x = np.mgrid[0:height, 0:width]
+    base = rng.uniform(60, 200, size=3)
+    background = np.stack([
+        base[c] + 40 * np.sin(x / (150 + 50 * c)) + 30 * np.cos(y / (200 + 40 * c)) for c in range(3)
+    ], axis=-1).clip(0, 255).astype(np.uint8)
+    clean = Image.fromarray(background)
+    image = clean.copy()
+    mask = Image.new("L", clean.size, 0)
+    draw, mask_draw = ImageDraw.Draw(image), ImageDraw.Draw(mask)
+    font = ImageFont.truetype("arial.ttf", max(16, long_edge // 30))
+    for i in range(lines):
+        position = (width // 10, height // 8 + i * (height // (lines + 4)))
+        text = "Free as a bird " * 2
+        draw.text(position, text, font=font, fill=(20, 20, 20))
+        left, top, right, bottom = draw.textbbox(position, text, font=font)
+        mask_draw.rectangle((left - 4, top - 4, right + 4, bottom + 4), fill=255)
+    return clean, image, mask
+
+
+def masked_psnr(reference: Image.Image, result: Image.Image, mask: Image.Image) -> float:
+    selected = np.array(mask) > 0
+    diff = np.array(reference, dtype=np.float64)[selected] - np.array(result, dtype=np.float64)[selected]
+    mse = float(np.mean(diff ** 2))
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def run_case(model_name: str, mode: str, long_edge: int, lines: int, repeats: int, queue):
+    model = load_model(model_name)
+    clean, image, mask = make_sample(long_edge, lines)
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = inpaint(model, image, mask, mode=mode)
+        latencies.append((time.perf_counter() - start) * 1000)
+    regions = mask_regions(np.array(mask), 32)
+    queue.put({
+        "model": model_name,
+        "mode": mode,
+        "long_edge": long_edge,
+        "lines": lines,
+        "regions": len(regions),
+        "coverage": round(region_coverage(regions, image.width, image.height), 4),
+        "latency_ms_median": round(statistics.median(latencies), 2),
+        "latency_ms_min": round(min(latencies), 2),
+        "peak_rss_mb": round_mb(peak_rss_mb()),
+        "psnr_db": round(masked_psnr(clean, result, mask), 2),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", choices=("opencv", "lama"), default="opencv")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1080, 2160])
+    parser.add_argument("--lines", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for long_edge in args.sizes:
+        for mode in ("full", "regions"):
+            queue = context.Queue()
+            process = context.Process(
+                target=run_case, args=(args.model, mode, long_edge, args.lines, args.repeats, queue)
+            )
+            process.start()
+            result = queue.get()
+            process.join()
+            results.append(result)
+            print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
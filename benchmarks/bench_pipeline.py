@@ -0,0 +1,340 @@
+"""
+Offline benchmark of the translate-and-render pipeline on a generated corpus.
+
+Every scenario is one (image size, text density, number of target languages)
+triple and runs in a fresh process, so peak RSS is comparable between them.
+Each scenario times:
+- the ImageProcessor stages called directly (decode, ocr, inpaint, translate,
+  render, encode), with how much each stage raised the process's peak RSS;
+- ContentTranslatorAgent.process_image end to end on unseen images, with
+  p50/p95 per stage from the response timings and overall throughput.
+
+Nothing touches the network: translation uses FakeTranslationBackend, OCR
+returns the known layout of the generated text (or runs Tesseract with
+--ocr tesseract), and inpainting uses an identity stub, OpenCV's Telea
+inpainting or SimpleLama on CPU. Caches, the store and artifacts live in a
+temporary directory.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pipeline --output pipeline.json
+    python -m benchmarks.bench_pipeline --model lama --sizes 1080 --languages 1 6 --baseline pipeline.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+import statistics
+import multiprocessing
+from queue import Empty
+from typing import Dict, List, Optional, Tuple
+from PIL import Image, ImageDraw, ImageFont
+from benchmarks.memory import peak_rss_mb, round_mb
+
+LANGUAGES = ["es", "fr", "de", "zh-cn", "ja", "en"]
+WORDS = (
+    "free as a bird summer sale new arrivals limited offer today only join us "
+    "discover the city fresh coffee open late weekend market live music tickets"
+).split()
+
+
+class StubInpainter:
+    """
+    Returns the input unchanged, to measure everything around the model.
+    """
+    def __call__(self, image: Image.Image, mask: Image.Image) -> Image.Image:
+        return image.copy()
+
+
+def load_model(name: str):
+    if name == "stub":
+        return StubInpainter()
+    from benchmarks.bench_inpainting import load_model as load_inpainting_model
+    return load_inpainting_model(name)
+
+
+def make_image(long_edge: int, lines: int, seed: int):
+    """
+    Return (image, OCR analysis of the drawn text) for a 4:5 frame with `lines` lines of text.
+    """
+    import numpy as np
+    from ocr import OCRAnalysis, OCRWord
+    rng = random.Random(seed)
+    width, height = int(long_edge * 0.8), long_edge
+    y, x = np.mgrid[0:height, 0:width]
+    base = [rng.uniform(60, 200) for _ in range(3)]
+    pixels = np.stack([
+        base[c] + 40 * np.sin(x / (150 + 50 * c)) + 30 * np.cos(y / (200 + 40 * c)) for c in range(3)
+    ], axis=-1).clip(0, 255).astype(np.uint8)
+    image = Image.fromarray(pixels)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.truetype("arial.ttf", max(16, long_edge // 40))
+    line_height = int(font.size * 1.4)
+    words = []
+    for line in range(lines):
+        left, top = width // 12, height // 10 + line * line_height
+        block = line // 3 + 1  # Three lines per paragraph block
+        for text in rng.sample(WORDS, 5):
+            x0, y0, x1, y1 = draw.textbbox((left, top), text, font=font)
+            draw.text((left, top), text, font=font, fill=(20, 20, 20))
+            words.append(OCRWord(text, x0, y0, x1 - x0, y1 - y0, 95.0, block, 1, line + 1))
+            left = x1 + font.size // 3
+    return image, OCRAnalysis(width, height, "eng", words)
+
+
+def _fingerprint(image: Image.Image) -> bytes:
+    return image.resize((8, 8), Image.NEAREST).tobytes()
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))], 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+    }
+
+
+def bench_stages(processor, corpus, languages, font_style, repeats: int) -> Dict[str, Dict[str, float]]:
+    """
+    Call the ImageProcessor stages one by one on every corpus image.
+    """
+    from translation import BatchTranslator
+    from models import Language
+    targets = [Language(code) for code in languages]
+    translator = BatchTranslator(processor.translation_backend)
+    timings: Dict[str, List[float]] = {}
+    rss_growth: Dict[str, Optional[float]] = {}
+
+    def timed(stage: str, fn, *args):
+        rss_before, start = peak_rss_mb(), time.perf_counter()
+        result = fn(*args)
+        timings.setdefault(stage, []).append((time.perf_counter() - start) * 1000)
+        rss_after = peak_rss_mb()
+        if rss_before is not None and rss_after is not None:
+            rss_growth[stage] = max(rss_growth.get(stage) or 0.0, rss_after - rss_before)
+        else:
+            rss_growth.setdefault(stage, None)
+        return result
+
+    for _ in range(repeats):
+        for png, _ in corpus:
+            image = timed("decode", processor.decode_image, png)
+            analysis = timed("ocr", processor.analyze_image, image, Language.ENGLISH)
+            background = timed("inpaint", processor.inpaint_background, image, analysis)
+            translations = timed(
+                "translate", asyncio.run, translator.translate_batch(analysis.segments, Language.ENGLISH, targets)
+            )
+            for language in targets:
+                rendered = timed(
+                    "render", processor.render_translation, background, analysis,
+                    "\n\n".join(translations[language]), font_style, translations[language], language
+                )
+                timed("encode", processor.encode_png, rendered)
+    return {
+        stage: dict(summarize(samples), rss_growth_mb=round_mb(rss_growth[stage]))
+        for stage, samples in timings.items()
+    }
+
+
+async def bench_agent(agent, corpus, languages, font_style, concurrency: int) -> Dict:
+    """
+    Send every corpus image through process_image, `concurrency` at a time.
+    """
+    import base64
+    from models import Language, ProcessImageRequest
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, stage_timings, errors = [], {}, 0
+
+    async def run_one(png: bytes):
+        nonlocal errors
+        request = ProcessImageRequest(
+            image_bytes=base64.b64encode(png).decode("ascii"), source_language=Language.ENGLISH,
+            target_languages=[Language(code) for code in languages], font_style=font_style,
+        )
+        async with semaphore:
+            start = time.perf_counter()
+            response = await agent.process_image(request)
+            latencies.append((time.perf_counter() - start) * 1000)
+        if response.error:
+            errors += 1
+        for stage, ms in (response.timings_ms or {}).items():
+            stage_timings.setdefault(stage, []).append(ms)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_one(png) for png, _ in corpus))
+    elapsed = time.perf_counter() - start
+    return {
+        "request": summarize(latencies),
+        "throughput_images_per_s": round(len(corpus) / elapsed, 3),
+        "errors": errors,
+        "stages": {stage: summarize(samples) for stage, samples in sorted(stage_timings.items())},
+    }
+
+
+def run_scenario(args: Dict, long_edge: int, lines: int, language_count: int, queue):
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    os.environ.update({
+        "TRANSLATION_MEMORY_PATH": os.path.join(workdir, "translation_memory.sqlite3"),
+        "IMAGE_CACHE_DIR": os.path.join(workdir, "image_cache"),
+        "CONTENT_DB_PATH": os.path.join(workdir, "content.sqlite3"),
+        "ARTIFACT_STORE": "local",
+        "ARTIFACT_DIR": os.path.join(workdir, "artifacts"),
+        "LEGACY_STORAGE_PATH": os.path.join(workdir, "none.json"),
+        "INPAINT_WORKERS": "0",
+        "WARM_MODELS_ON_STARTUP": "0",
+        "METRICS_PORT": "0",
+        "PROFILE_SAMPLE_RATE": "0",
+    })
+    # uagents binds the agent to the current event loop at import, before any asyncio.run()
+    import content_translator
+    from model_registry import MODEL_REGISTRY
+    from translation import FakeTranslationBackend
+    from Image_processor import ImageProcessor
+    MODEL_REGISTRY.register("lama", lambda: load_model(args["model"]))
+    rss_start = peak_rss_mb()
+
+    languages = LANGUAGES[:language_count]
+    font_style = {"family": "arial.ttf", "size": str(max(16, long_edge // 40)), "color": "#000000"}
+    truths: Dict[bytes, object] = {}
+    backend = FakeTranslationBackend(latency=args["translate_latency"])
+    processor = ImageProcessor(translation_backend=backend)
+
+    def corpus(offset: int) -> List[Tuple[bytes, object]]:
+        items = []
+        for i in range(args["images"]):
+            image, truth = make_image(long_edge, lines, seed=offset + i)
+            truths[_fingerprint(image)] = truth
+            items.append((processor.encode_png(image), truth))
+        return items
+
+    def patch_ocr(processor):
+        # Known layout of the generated text instead of Tesseract, unless asked for
+        if args["ocr"] == "truth":
+            processor.analyze_image = lambda image, language: truths[_fingerprint(processor._as_image(image))]
+
+    patch_ocr(processor)
+    MODEL_REGISTRY.get("lama")
+    stages = bench_stages(processor, corpus(0), languages, font_style, args["repeats"])
+
+    logging.getLogger("bench").setLevel(logging.WARNING)
+
+    class Context:
+        logger = logging.getLogger("bench")
+
+    agent = content_translator.ContentTranslatorAgent(Context())
+    agent.image_processor.translation_backend.backend = backend
+    patch_ocr(agent.image_processor)
+    # Fresh seeds so every request misses the image cache and does the full work
+    pipeline = asyncio.run(bench_agent(agent, corpus(10_000), languages, font_style, args["concurrency"]))
+    agent.workers.shutdown()
+
+    queue.put({
+        "long_edge": long_edge,
+        "lines": lines,
+        "languages": language_count,
+        "images": args["images"],
+        "stages": stages,
+        "pipeline": pipeline,
+        "peak_rss_mb": round_mb(peak_rss_mb()),
+        "rss_at_start_mb": round_mb(rss_start),
+    })
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(results: List[Dict], baseline_path: str):
+    """
+    Print the p50 change of every stage against a previous run's JSON.
+    """
+    with open(baseline_path) as f:
+        baseline = {
+            (r["long_edge"], r["lines"], r["languages"]): r for r in json.load(f)["results"]
+        }
+    for result in results:
+        key = (result["long_edge"], result["lines"], result["languages"])
+        if key not in baseline:
+            continue
+        old = baseline[key]
+        changes = []
+        for section in ("stages", "pipeline"):
+            new_stages = result[section] if section == "stages" else result[section]["stages"]
+            old_stages = old[section] if section == "stages" else old[section]["stages"]
+            for stage, summary in new_stages.items():
+                if stage in old_stages and old_stages[stage]["p50_ms"]:
+                    ratio = summary["p50_ms"] / old_stages[stage]["p50_ms"]
+                    changes.append(f"{section}.{stage} {ratio:.2f}x")
+        print(f"{key}: " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", choices=("stub", "opencv", "lama"), default="opencv")
+    parser.add_argument("--ocr", choices=("truth", "tesseract"), default="truth")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[720, 1440])
+    parser.add_argument("--lines", type=int, nargs="+", default=[2, 8])
+    parser.add_argument("--languages", type=int, nargs="+", default=[1, 3, 6], choices=range(1, 7))
+    parser.add_argument("--images", type=int, default=4, help="distinct images per scenario")
+    parser.add_argument("--repeats", type=int, default=2, help="passes over the images for the stage timings")
+    parser.add_argument("--concurrency", type=int, default=1, help="process_image calls in flight")
+    parser.add_argument("--translate-latency", type=float, default=0.0, help="seconds per fake backend call")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare p50s against")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for long_edge in args.sizes:
+        for lines in args.lines:
+            for language_count in args.languages:
+                queue = context.Queue()
+                process = context.Process(
+                    target=run_scenario, args=(vars(args), long_edge, lines, language_count, queue)
+                )
+                process.start()
+                result = None
+                while result is None:
+                    try:
+                        result = queue.get(timeout=1)
+                    except Empty:
+                        if not process.is_alive():
+                            raise SystemExit(f"Scenario {long_edge}px/{lines} lines/{language_count} languages failed")
+                process.join()
+                results.append(result)
+                print(json.dumps({
+                    "long_edge": long_edge, "lines": lines, "languages": language_count,
+                    "request": result["pipeline"]["request"],
+                    "throughput_images_per_s": result["pipeline"]["throughput_images_per_s"],
+                    "peak_rss_mb": result["peak_rss_mb"],
+                }))
+
+    if args.baseline:
+        compare(results, args.baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "commit": _git_commit(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "args": vars(args),
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
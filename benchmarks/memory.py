@@ -0,0 +1,32 @@
+"""
+Peak resident set size of the benchmark process, on any platform.
+"""
+import sys
+from typing import Optional
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Peak RSS of this process in MiB, or None where it cannot be measured
+    (Windows without psutil).
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in KiB on Linux and the BSDs
+        return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    # peak_wset is the Windows peak working set; other platforms only report current RSS
+    return getattr(info, "peak_wset", info.rss) / (1 << 20)
+
+
+def round_mb(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
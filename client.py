@@ -1,9 +1,10 @@
 import os
+import base64
 import asyncio
 from datetime import datetime
 from dotenv import load_dotenv
 from uagents import Agent, Context
-from models import Language, Platform, TimeZone, ProcessImageRequest, ProcessImageResponse, SchedulePostRequest, SchedulePostResponse
+from models import Language, Platform, TimeZone, ProcessImageRequest, ProcessImageResponse, SchedulePostRequest, SchedulePostResponse, ProcessImageBatchResponse, ArtifactRequest, ArtifactResponse
 
 # Load environment variables
 load_dotenv()
@@ -13,6 +14,8 @@ CLIENT_SEED = os.getenv("CLIENT_SEED", "content-translator-client-seed")
 CLIENT_PORT = int(os.getenv("CLIENT_PORT", "8001"))
 CLIENT_ENDPOINT = f"http://localhost:{CLIENT_PORT}/submit"
 CONTENT_TRANSLATOR_ADDRESS = os.getenv("CONTENT_TRANSLATOR_ADDRESS", "")
+# Where to save rendered images fetched from the agent's artifact store (empty: don't download)
+CLIENT_DOWNLOAD_DIR = os.getenv("CLIENT_DOWNLOAD_DIR", "")
 
 # Create the client agent
 client_agent = Agent(
@@ -39,8 +42,11 @@ async def process_image(ctx: Context):
     """
     ctx.logger.info("Requesting image processing")
     try:
+        # Send the image itself so the agent needs no access to this machine's files
+        with open("image.jpg", "rb") as f:
+            image_bytes = base64.b64encode(f.read()).decode("ascii")
         await ctx.send(CONTENT_TRANSLATOR_ADDRESS, ProcessImageRequest(
-            image_path="image.jpg",
+            image_bytes=image_bytes,
             source_language=Language.ENGLISH,
             target_languages=[Language.SPANISH, Language.FRENCH],
             font_style={"family": "arial.ttf", "size": "24", "color": "#000000"}
@@ -76,12 +82,57 @@ async def handle_process_image_response(ctx: Context, sender: str, msg: ProcessI
         ctx.logger.info(f"Extracted text: {msg.original_content.extracted_text}")
         for translated_content in msg.translated_contents:
             ctx.logger.info(f"Translated to {translated_content.target_language.value}: {translated_content.translated_text}")
-            ctx.logger.info(f"Edited image: {translated_content.edited_image_path}")
+            ctx.logger.info(f"Edited image: {translated_content.edited_image_url}")
+            await download_artifact(ctx, translated_content.edited_image_key)
         # Schedule posts using the actual image_id
         await schedule_posts(ctx, msg.image_id)
     else:
         ctx.logger.error("Image processing failed: No original content returned")
 
+@client_agent.on_message(model=ProcessImageBatchResponse)
+async def handle_process_image_batch_response(ctx: Context, sender: str, msg: ProcessImageBatchResponse):
+    """
+    Handle one streamed result of a batch image processing request.
+    """
+    ctx.logger.info(f"Batch {msg.batch_id}: {msg.completed}/{msg.total} done (item {msg.index})")
+    if msg.error:
+        ctx.logger.error(f"Batch {msg.batch_id} item {msg.index} failed: {msg.error}")
+    elif msg.result:
+        for translated_content in msg.result.translated_contents:
+            ctx.logger.info(f"Edited image ({translated_content.target_language.value}): {translated_content.edited_image_url}")
+            await download_artifact(ctx, translated_content.edited_image_key)
+
+async def download_artifact(ctx: Context, key: str):
+    """
+    Ask the agent for an artifact; its parts arrive as ArtifactResponse messages.
+    """
+    if not CLIENT_DOWNLOAD_DIR or not key:
+        return
+    os.makedirs(CLIENT_DOWNLOAD_DIR, exist_ok=True)
+    # Start from an empty file; parts are written at their offsets
+    open(os.path.join(CLIENT_DOWNLOAD_DIR, os.path.basename(key)), "wb").close()
+    await ctx.send(CONTENT_TRANSLATOR_ADDRESS, ArtifactRequest(key=key))
+
+@client_agent.on_message(model=ArtifactResponse)
+async def handle_artifact_response(ctx: Context, sender: str, msg: ArtifactResponse):
+    """
+    Save one part of a downloaded artifact and request the next.
+    """
+    if msg.error:
+        ctx.logger.error(f"Download of {msg.key} failed: {msg.error}")
+        return
+    if not CLIENT_DOWNLOAD_DIR:
+        return
+    path = os.path.join(CLIENT_DOWNLOAD_DIR, os.path.basename(msg.key))
+    data = base64.b64decode(msg.data)
+    with open(path, "r+b") as f:
+        f.seek(msg.offset)
+        f.write(data)
+    if msg.done:
+        ctx.logger.info(f"Downloaded {msg.key} to {path} ({msg.total_bytes} bytes)")
+    else:
+        await ctx.send(sender, ArtifactRequest(key=msg.key, offset=msg.offset + len(data)))
+
 @client_agent.on_message(model=SchedulePostResponse)
 async def handle_schedule_post_response(ctx: Context, sender: str, msg: SchedulePostResponse):
     """
@@ -1,16 +1,39 @@
+import time
+_PROCESS_STARTED = time.perf_counter()
+
 import os
 import uuid
+import base64
 import asyncio
+import random
+import hashlib
+import functools
 from datetime import datetime
+from typing import AsyncIterator, Optional, Tuple
 from dotenv import load_dotenv
 from uagents import Agent, Context
 from uagents.experimental.quota import QuotaProtocol, RateLimit
 from models import (
     Language, Platform, TimeZone, ImageContent, TranslatedContent, PostSchedule,
-    ProcessImageRequest, ProcessImageResponse, SchedulePostRequest, SchedulePostResponse
+    ProcessImageRequest, ProcessImageResponse, SchedulePostRequest, SchedulePostResponse,
+    HealthRequest, HealthResponse, ProcessImageBatchRequest, ProcessImageBatchResponse,
+    ScheduleBulkRequest, ScheduleBulkResponse, MetricsRequest, MetricsResponse,
+    CancelRequest, CancelResponse, ArtifactRequest, ArtifactResponse, Priority
 )
 from Image_processor import ImageProcessor
 from scheduler import PostScheduler
+from workers import WorkerPool, WorkerConfig
+from translation import BatchTranslator, GoogleTranslateBackend
+from translation_memory import TranslationMemory, CachedTranslationBackend
+from image_cache import ImageResultCache, params_key
+from artifact_store import artifact_store_from_env, read_image_source
+from model_registry import MODEL_REGISTRY
+from storage import ContentStore
+from dispatcher import PostDispatcher
+from metrics import METRICS, CURRENT_TRACE, RequestTrace
+from admission import (
+    AdmissionController, AdmissionConfig, AdmissionRejectedError, RequestCancelledError, request_fingerprint
+)
 
 # Load environment variables
 load_dotenv()
@@ -19,6 +42,16 @@ load_dotenv()
 AGENT_SEED = os.getenv("AGENT_SEED", "content-translator-agent-seed")
 AGENT_PORT = int(os.getenv("AGENT_PORT", "8000"))
 AGENT_ENDPOINT = f"http://localhost:{AGENT_PORT}/submit"
+WARM_MODELS_ON_STARTUP = os.getenv("WARM_MODELS_ON_STARTUP", "1") == "1"
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 disables the /metrics endpoint
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")  # "0.0.0.0" exposes /metrics beyond this host
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # Fraction of requests to profile
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+DEDUPLICATE_REQUESTS = os.getenv("DEDUPLICATE_REQUESTS", "1") == "1"
+ARTIFACT_FETCH_MAX_BYTES = int(os.getenv("ARTIFACT_FETCH_MAX_BYTES", str(256 << 10)))  # Per ArtifactResponse
+ARTIFACT_FETCH_PER_MINUTE = int(os.getenv("ARTIFACT_FETCH_PER_MINUTE", "600"))  # One request per part
+RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "10"))
 
 # Create the agent
 content_translator = Agent(
@@ -33,64 +66,275 @@ translator_protocol = QuotaProtocol(
     storage_reference=content_translator.storage,
     name="Content-Translator-Protocol",
     version="0.1.0",
-    default_rate_limit=RateLimit(window_size_minutes=1, max_requests=10),
+    default_rate_limit=RateLimit(window_size_minutes=1, max_requests=RATE_LIMIT_PER_MINUTE),
 )
 
 # Global agent instance
 AGENT_INSTANCE = None
 
+DEFAULT_FONT_STYLE = {"family": "arial.ttf", "size": "24", "color": "#000000"}
+
+def error_response(request: ProcessImageRequest, error: str) -> ProcessImageResponse:
+    image_id = str(uuid.uuid4())
+    return ProcessImageResponse(
+        image_id=image_id,
+        original_content=ImageContent(image_id=image_id, image_path=request.image_path or request.image_url or "", source_language=request.source_language, extracted_text="", timestamp=datetime.now().isoformat()),
+        translated_contents=[],
+        error=error,
+        request_id=request.request_id,
+    )
+
 class ContentTranslatorAgent:
     def __init__(self, ctx: Context):
         try:
             self.ctx = ctx
-            self.image_processor = ImageProcessor()
+            self.workers = WorkerPool(WorkerConfig.from_env())
+            self.admission = AdmissionController(AdmissionConfig.from_env())
+            self.background_tasks = set()
+            self.translation_memory = TranslationMemory.from_env()
+            self.image_cache = ImageResultCache.from_env()
+            self.artifact_store = artifact_store_from_env()
+            self.image_processor = ImageProcessor(
+                load_inpainting_model=not self.workers.uses_process_pool,
+                translation_backend=CachedTranslationBackend(GoogleTranslateBackend(), self.translation_memory),
+            )
+            self.batch_translator = BatchTranslator(
+                self.image_processor.translation_backend,
+                max_concurrency=self.workers.config.translate_concurrency,
+                dispatch=functools.partial(self.workers.run_thread, "translate"),
+            )
             self.scheduler = PostScheduler()
-            self._initialize_storage()
+            self.startup_seconds = None
+            self.first_request_seconds = None
+            self.store = ContentStore.from_env()
+            self._import_legacy_storage()
+            self.dispatcher = PostDispatcher.from_env(self.store, logger=ctx.logger)
+            METRICS.add_collector(self._metric_gauges)
         except Exception as e:
             ctx.logger.error(f"Failed to initialize ContentTranslatorAgent: {e}")
             raise
 
-    def _initialize_storage(self):
-        if not self.ctx.storage.get("images"):
-            self.ctx.storage.set("images", {})
-        if not self.ctx.storage.get("translations"):
-            self.ctx.storage.set("translations", {})
-        if not self.ctx.storage.get("schedules"):
-            self.ctx.storage.set("schedules", [])
+    def _import_legacy_storage(self):
+        # Records kept in the agent storage file by earlier versions move to the store once
+        legacy_path = os.getenv("LEGACY_STORAGE_PATH", f"{content_translator.address[0:16]}_data.json")
+        if os.path.exists(legacy_path):
+            imported = self.store.import_agent_storage(legacy_path)
+            if any(imported.values()):
+                self.ctx.logger.info(f"Imported legacy agent storage {legacy_path}: {imported}")
+
+    def _metric_gauges(self):
+        gauges = {"worker_jobs_pending": self.workers.pending}
+        gauges.update({f"admission_{name}": value for name, value in self.admission.stats().items()})
+        gauges.update({f"translation_memory_{name}": value for name, value in self.translation_memory.stats().items()})
+        gauges.update({f"image_cache_{name}": value for name, value in self.image_cache.stats().items()})
+        return gauges
+
+    async def warm_models(self):
+        await self.workers.start_inpainting()
+        # Load Tesseract engines for the usual source languages before the first request
+        for lang in filter(None, os.getenv("OCR_WARM_LANGUAGES", "eng").split(",")):
+            await self.workers.run_thread("ocr_warm", self.image_processor.ocr_backend.warm, lang.strip())
+        self.ctx.logger.info(f"Models warmed: {self.workers.model_status()}")
+
+    def spawn(self, coro):
+        # Keep a reference so the task is not garbage collected while it runs
+        task = asyncio.ensure_future(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+        return task
+
+    def read_artifact(self, key: str, offset: int, length: int) -> Tuple[bytes, int]:
+        """
+        Up to length bytes of an artifact from offset, and its total size.
+        """
+        if offset < 0:
+            raise ValueError(f"Negative offset {offset}")
+        size = self.artifact_store.size(key)
+        return self.artifact_store.read_range(key, offset, min(length, size - offset)), size
+
+    async def submit_image(self, request: ProcessImageRequest, sender: str,
+                           priority: Optional[Priority] = None, wait: bool = False) -> ProcessImageResponse:
+        """
+        Process an image through the admission queue. Rejected and cancelled
+        requests get an error response; rejections also carry a retry-after hint.
+        With wait, a full queue delays the request instead of rejecting it.
+        An identical request already queued or running shares its result.
+        """
+        priority = priority or request.priority
+        try:
+            response = await self.admission.submit(
+                functools.partial(self.process_image, request),
+                sender=sender,
+                priority=priority,
+                key=request_fingerprint(request) if DEDUPLICATE_REQUESTS else None,
+                waiter_id=(sender, request.request_id) if request.request_id else None,
+                wait=wait,
+            )
+            # Deduplicated requests share one response; each sender gets its own request_id
+            return response.copy(update={"request_id": request.request_id})
+        except AdmissionRejectedError as e:
+            self.ctx.logger.warning(f"Rejected {priority.value} request from {sender}: {e}")
+            response = error_response(request, str(e))
+            response.retry_after_seconds = e.retry_after
+            return response
+        except RequestCancelledError as e:
+            self.ctx.logger.info(f"Cancelled request {request.request_id} from {sender}")
+            return error_response(request, str(e))
+        except Exception as e:
+            self.ctx.logger.error(f"Error processing image: {e}")
+            return error_response(request, str(e))
 
     async def process_image(self, request: ProcessImageRequest) -> ProcessImageResponse:
-        self.ctx.logger.info(f"Processing image: {request.image_path}")
+        # Stages run during this request record their timings in its trace
+        trace = RequestTrace(profile=request.profile or random.random() < PROFILE_SAMPLE_RATE)
+        token = CURRENT_TRACE.set(trace)
+        started = time.perf_counter()
         try:
-            # Extract text
-            self.ctx.logger.info("Extracting text")
+            response = await self._process_image(request)
+        finally:
+            CURRENT_TRACE.reset(token)
+        METRICS.observe("request_seconds", time.perf_counter() - started)
+        METRICS.inc("requests_total", status="error" if response.error else "ok")
+        response.timings_ms = trace.timings_ms()
+        self.ctx.logger.info(f"Stage timings (ms): {response.timings_ms}")
+        if trace.profile:
+            try:
+                response.profile_path = await self.workers.run_thread(
+                    "profile", trace.dump_profile, os.path.join(PROFILE_DIR, f"{response.image_id}.prof")
+                )
+                self.ctx.logger.info(f"Profile written: {response.profile_path}")
+            except Exception as e:
+                self.ctx.logger.error(f"Error writing profile: {e}")
+        return response
+
+    async def _process_image(self, request: ProcessImageRequest) -> ProcessImageResponse:
+        image_source = request.image_path or request.image_url or "inline image"
+        self.ctx.logger.info(f"Processing image: {image_source}")
+        started = time.perf_counter()
+        try:
+            font_style = request.font_style or DEFAULT_FONT_STYLE
+            image_data = await self.workers.run_thread(
+                "fetch", read_image_source, self.artifact_store,
+                request.image_path, request.image_bytes, request.image_url
+            )
+            image_hash = await self.workers.run_thread("hash", lambda: hashlib.sha256(image_data).hexdigest())
+            if request.image_bytes:
+                # Keep inline uploads so the stored record points at retrievable content
+                input_key = await self.workers.run_thread("upload", self.artifact_store.put_bytes, image_data)
+                image_source = self.artifact_store.url(input_key)
+            # Cached results are only reused under the settings that produced them
+            settings = self.image_processor.cache_settings()
+            params = params_key(request.source_language, font_style, settings["render"])
+            cached_outputs = {}
+            for target_language in request.target_languages:
+                output = await self.workers.run_thread(
+                    "cache", self.image_cache.get_output, image_hash, target_language, params
+                )
+                # A network round trip for S3, so it runs on a worker thread
+                if output is not None and not await self.workers.run_thread(
+                    "cache", self.artifact_store.exists, output[0]
+                ):
+                    output = None  # The render was removed from the artifact store
+                METRICS.inc("cache_lookups_total", cache="output", result="miss" if output is None else "hit")
+                cached_outputs[target_language] = output
+
+            # Decode at most once; OCR, masking and inpainting share the same buffer
+            image = None
+
+            async def decoded_image():
+                nonlocal image
+                if image is None:
+                    image = await self.workers.run_thread("decode", self.image_processor.decode_image, image_data)
+                return image
+
+            # Run OCR once; extraction and every target language share the analysis
+            analysis = await self.workers.run_thread(
+                "cache", self.image_cache.get_analysis, image_hash, request.source_language, settings["ocr"]
+            )
+            METRICS.inc("cache_lookups_total", cache="analysis", result="miss" if analysis is None else "hit")
+            if analysis is None:
+                self.ctx.logger.info("Extracting text")
+                analysis = await self.workers.run_thread(
+                    "ocr", self.image_processor.analyze_image, await decoded_image(), request.source_language
+                )
+                await self.workers.run_thread(
+                    "cache", self.image_cache.put_analysis,
+                    image_hash, request.source_language, settings["ocr"], analysis
+                )
             image_content = self.image_processor.extract_text(
-                request.image_path, request.source_language
+                image_source, request.source_language, analysis=analysis, image_id=image_hash[:32]
             )
             self.ctx.logger.info(f"Extracted text: {image_content.extracted_text}")
             if not image_content.extracted_text.strip():
                 self.ctx.logger.warning("No text extracted from image")
-                image_content = ImageContent(image_id=image_content.image_id, image_path=request.image_path, source_language=request.source_language, extracted_text="", timestamp=datetime.now().isoformat())
-            self.ctx.storage.get("images")[image_content.image_id] = image_content.dict()
+                image_content = ImageContent(image_id=image_content.image_id, image_path=image_source, source_language=request.source_language, extracted_text="", timestamp=datetime.now().isoformat())
+            self.store.put_image(image_content)
+            if not analysis.text.strip():
+                return await self._untranslated_response(image_content, request, image_data)
 
-            # Translate and replace text
-            translated_contents = []
-            for target_language in request.target_languages:
-                self.ctx.logger.info(f"Translating to {target_language.value}")
-                translated_text = self.image_processor.translate_text(
-                    image_content.extracted_text, request.source_language, target_language
+            # Inpaint once while every uncached target language is translated concurrently;
+            # each language is then drawn onto a copy of the same background
+            pending_languages = [language for language, output in cached_outputs.items() if output is None]
+            translations = {}
+            if pending_languages:
+                background = await self.workers.run_thread(
+                    "cache", self.image_cache.get_background, image_hash, request.source_language, settings["inpaint"]
                 )
-                self.ctx.logger.info(f"Translated text: {translated_text}")
-                edited_image_path = self.image_processor.replace_text_in_image(
-                    request.image_path, image_content.extracted_text, translated_text,
-                    request.font_style or {"family": "arial.ttf", "size": "24", "color": "#000000"}
+                METRICS.inc("cache_lookups_total", cache="background", result="miss" if background is None else "hit")
+                self.ctx.logger.info(f"Translating to {len(pending_languages)} languages")
+                translation_task = self.batch_translator.translate_batch(
+                    analysis.segments, request.source_language, pending_languages
                 )
-                self.ctx.logger.info(f"Edited image saved: {edited_image_path}")
+                if background is None:
+                    self.ctx.logger.info("Inpainting background")
+                    background, translations = await asyncio.gather(
+                        self.workers.inpaint(self.image_processor, await decoded_image(), analysis),
+                        translation_task,
+                    )
+                    await self.workers.run_thread(
+                        "cache", self.image_cache.put_background,
+                        image_hash, request.source_language, settings["inpaint"], background
+                    )
+                else:
+                    translations = await translation_task
+                self.ctx.logger.info(f"Translation memory: {self.translation_memory.stats()}")
+
+            # Replace text
+            translated_contents = []
+            for target_language in request.target_languages:
+                if cached_outputs[target_language] is not None:
+                    edited_image_key, translated_text = cached_outputs[target_language]
+                    self.ctx.logger.info(f"Using cached render for {target_language.value}")
+                else:
+                    translated_text = "\n\n".join(translations[target_language])
+                    self.ctx.logger.info(f"Translated text ({target_language.value}): {translated_text}")
+                    edited_image = await self.workers.run_thread(
+                        "render", self.image_processor.render_translation, background, analysis,
+                        translated_text, font_style, translations[target_language], target_language
+                    )
+                    png = await self.workers.run_thread("encode", self.image_processor.encode_png, edited_image)
+                    edited_image_key = await self.workers.run_thread(
+                        "upload", self.artifact_store.put_bytes, png, ".png"
+                    )
+                    await self.workers.run_thread(
+                        "cache", self.image_cache.put_output,
+                        image_hash, target_language, params, edited_image_key, translated_text
+                    )
+                edited_image_url = self.artifact_store.url(edited_image_key)
+                self.ctx.logger.info(f"Edited image saved: {edited_image_url}")
                 translated_content = TranslatedContent.create(
-                    image_content.image_id, target_language, translated_text, edited_image_path
+                    image_content.image_id, target_language, translated_text,
+                    edited_image_path=self.artifact_store.local_path(edited_image_key),
+                    edited_image_key=edited_image_key,
+                    edited_image_url=edited_image_url,
                 )
                 translated_contents.append(translated_content)
-                self.ctx.storage.get("translations")[f"{image_content.image_id}_{target_language.value}"] = translated_content.dict()
+                self.store.put_translation(translated_content)
 
+            elapsed = time.perf_counter() - started
+            if self.first_request_seconds is None:
+                self.first_request_seconds = elapsed
+            self.ctx.logger.info(f"Processed image in {elapsed * 1000:.0f}ms")
             return ProcessImageResponse(
                 image_id=image_content.image_id,
                 original_content=image_content,
@@ -98,12 +342,64 @@ class ContentTranslatorAgent:
             )
         except Exception as e:
             self.ctx.logger.error(f"Error processing image: {e}")
-            image_id = str(uuid.uuid4())
-            return ProcessImageResponse(
-                image_id=image_id,
-                original_content=ImageContent(image_id=image_id, image_path=request.image_path, source_language=request.source_language, extracted_text="", timestamp=datetime.now().isoformat()),
-                translated_contents=[],
-                error=str(e)
+            return error_response(request, str(e))
+
+    async def _untranslated_response(self, image_content: ImageContent, request: ProcessImageRequest,
+                                     image_data: bytes) -> ProcessImageResponse:
+        """
+        Short-circuit for images without text: nothing is translated, inpainted or
+        rendered, and every target language gets the original image back.
+        """
+        METRICS.inc("requests_without_text_total")
+        key = await self.workers.run_thread("upload", self.artifact_store.put_bytes, image_data)
+        translated_contents = []
+        for target_language in request.target_languages:
+            translated_content = TranslatedContent.create(
+                image_content.image_id, target_language, "",
+                edited_image_path=self.artifact_store.local_path(key),
+                edited_image_key=key,
+                edited_image_url=self.artifact_store.url(key),
+            )
+            translated_contents.append(translated_content)
+            self.store.put_translation(translated_content)
+        return ProcessImageResponse(
+            image_id=image_content.image_id,
+            original_content=image_content,
+            translated_contents=translated_contents
+        )
+
+    async def process_image_batch(self, request: ProcessImageBatchRequest, batch_id: str,
+                                  sender: str = "") -> AsyncIterator[ProcessImageBatchResponse]:
+        """
+        Process every image of a batch, yielding a response as each one finishes.
+
+        Up to BATCH_CONCURRENCY images are in flight at once. Their stages run on
+        different pools, so one image can be inpainted while the next is in OCR
+        and another is being translated. Images go through the admission queue
+        as bulk work, so batches yield to interactive requests, and wait for room
+        when it is full rather than failing with a retry-after.
+        """
+        total = len(request.requests)
+        self.ctx.logger.info(f"Processing batch {batch_id} of {total} images")
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def process_item(index: int, item: ProcessImageRequest):
+            async with semaphore:
+                return index, await self.submit_image(item, sender, Priority.BULK, wait=True)
+
+        tasks = [asyncio.ensure_future(process_item(i, item)) for i, item in enumerate(request.requests)]
+        completed = 0
+        for next_done in asyncio.as_completed(tasks):
+            index, result = await next_done
+            completed += 1
+            yield ProcessImageBatchResponse(
+                batch_id=batch_id,
+                index=index,
+                total=total,
+                completed=completed,
+                result=result,
+                error=result.error,
+                done=completed == total,
             )
 
     async def schedule_posts(self, request: SchedulePostRequest) -> SchedulePostResponse:
@@ -112,15 +408,33 @@ class ContentTranslatorAgent:
             schedules = self.scheduler.schedule_posts(
                 request.image_id, request.platforms, request.language_time_zones, request.optimal_time
             )
-            current_schedules = self.ctx.storage.get("schedules") or []
-            current_schedules.extend([s.dict() for s in schedules])
-            self.ctx.storage.set("schedules", current_schedules)
+            schedule_ids = self.store.add_schedules(schedules)
+            for schedule, schedule_id in zip(schedules, schedule_ids):
+                schedule.schedule_id = schedule_id
+            self.dispatcher.add(schedules)
             self.ctx.logger.info(f"Scheduled {len(schedules)} posts")
             return SchedulePostResponse(schedules=schedules)
         except Exception as e:
             self.ctx.logger.error(f"Error scheduling posts: {e}")
             return SchedulePostResponse(schedules=[])
 
+    async def schedule_bulk(self, request: ScheduleBulkRequest) -> ScheduleBulkResponse:
+        self.ctx.logger.info(f"Scheduling posts for {len(request.image_ids)} images")
+        try:
+            batch = self.scheduler.schedule_bulk(
+                request.image_ids, request.platforms, request.language_time_zones, request.optimal_time,
+                spread_minutes=request.spread_minutes, slot_minutes=request.slot_minutes
+            )
+            schedule_ids = self.store.add_schedule_batch(batch)
+            self.dispatcher.add_ids(batch.scheduled_at, schedule_ids)
+            self.ctx.logger.info(f"Scheduled {len(schedule_ids)} posts")
+            return ScheduleBulkResponse(
+                count=len(schedule_ids), first_schedule_id=schedule_ids[0] if schedule_ids else None
+            )
+        except Exception as e:
+            self.ctx.logger.error(f"Error scheduling posts: {e}")
+            return ScheduleBulkResponse(count=0, error=str(e))
+
 @content_translator.on_event("startup")
 async def startup(ctx: Context):
     ctx.logger.info(f"Content Translator Agent started with address: {content_translator.address}")
@@ -130,23 +444,121 @@ async def startup(ctx: Context):
     except Exception as e:
         ctx.logger.error(f"Failed to initialize agent instance: {e}")
         AGENT_INSTANCE = None
+        return
+    AGENT_INSTANCE.startup_seconds = time.perf_counter() - _PROCESS_STARTED
+    ctx.logger.info(f"Agent ready in {AGENT_INSTANCE.startup_seconds:.2f}s")
+    # Resume firing posts that were still pending when the agent last stopped
+    ctx.logger.info(f"Loaded {AGENT_INSTANCE.dispatcher.load_pending()} pending posts")
+    if METRICS_PORT:
+        METRICS.serve(METRICS_PORT, METRICS_HOST)
+        ctx.logger.info(f"Serving metrics at http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+    AGENT_INSTANCE.spawn(AGENT_INSTANCE.dispatcher.run())
+    if WARM_MODELS_ON_STARTUP:
+        # Load LaMa in the background once the agent is reachable
+        AGENT_INSTANCE.spawn(AGENT_INSTANCE.warm_models())
+
+@content_translator.on_event("shutdown")
+async def shutdown(ctx: Context):
+    global AGENT_INSTANCE
+    if AGENT_INSTANCE:
+        AGENT_INSTANCE.dispatcher.stop()
+        for task in list(AGENT_INSTANCE.background_tasks):
+            task.cancel()
+        AGENT_INSTANCE.workers.shutdown(wait=False)
+        AGENT_INSTANCE.translation_memory.close()
+        AGENT_INSTANCE.store.close()
 
-@translator_protocol.on_message(model=ProcessImageRequest, replies={ProcessImageResponse})
+# uagents awaits each handler before reading the next message, so image handlers
+# only queue the work and return; the reply is sent when the job finishes. The
+# replies are therefore left out of the decorators, whose check runs as the
+# handler returns.
+@translator_protocol.on_message(model=ProcessImageRequest)
 async def handle_process_image(ctx: Context, sender: str, msg: ProcessImageRequest):
-    ctx.logger.info(f"Received request to process image from {sender}")
+    ctx.logger.info(f"Received {msg.priority.value} request to process image from {sender}")
     global AGENT_INSTANCE
     if not AGENT_INSTANCE:
         ctx.logger.error("Agent instance not found")
-        default_image_id = str(uuid.uuid4())
-        await ctx.send(sender, ProcessImageResponse(
-            image_id=default_image_id,
-            original_content=ImageContent(image_id=default_image_id, image_path=msg.image_path, source_language=msg.source_language, extracted_text="", timestamp=datetime.now().isoformat()),
-            translated_contents=[],
-            error="Agent initialization failed"
+        await ctx.send(sender, error_response(msg, "Agent initialization failed"))
+        return
+
+    async def respond():
+        await ctx.send(sender, await AGENT_INSTANCE.submit_image(msg, sender))
+
+    AGENT_INSTANCE.spawn(respond())
+
+@translator_protocol.on_message(model=CancelRequest, replies={CancelResponse})
+async def handle_cancel(ctx: Context, sender: str, msg: CancelRequest):
+    global AGENT_INSTANCE
+    cancelled = AGENT_INSTANCE is not None and AGENT_INSTANCE.admission.cancel((sender, msg.request_id))
+    ctx.logger.info(f"Cancel of request {msg.request_id} from {sender}: {'done' if cancelled else 'not found'}")
+    await ctx.send(sender, CancelResponse(request_id=msg.request_id, cancelled=cancelled))
+
+@translator_protocol.on_message(model=ProcessImageBatchRequest)
+async def handle_process_image_batch(ctx: Context, sender: str, msg: ProcessImageBatchRequest):
+    ctx.logger.info(f"Received request to process {len(msg.requests)} images from {sender}")
+    global AGENT_INSTANCE
+    batch_id = msg.batch_id or str(uuid.uuid4())
+    if not AGENT_INSTANCE or not msg.requests:
+        error = "Agent initialization failed" if not AGENT_INSTANCE else "Batch contains no images"
+        ctx.logger.error(error)
+        await ctx.send(sender, ProcessImageBatchResponse(
+            batch_id=batch_id, index=-1, total=len(msg.requests), completed=0, error=error, done=True
         ))
         return
-    response = await AGENT_INSTANCE.process_image(msg)
-    await ctx.send(sender, response)
+
+    async def respond():
+        async for response in AGENT_INSTANCE.process_image_batch(msg, batch_id, sender):
+            await ctx.send(sender, response)
+
+    AGENT_INSTANCE.spawn(respond())
+
+@translator_protocol.on_message(model=HealthRequest, replies={HealthResponse})
+async def handle_health(ctx: Context, sender: str, msg: HealthRequest):
+    global AGENT_INSTANCE
+    # The inpainting workers hold their own LaMa, so ask the pool rather than this process's registry
+    status = AGENT_INSTANCE.workers.model_status() if AGENT_INSTANCE else MODEL_REGISTRY.status()
+    await ctx.send(sender, HealthResponse(
+        ready=AGENT_INSTANCE is not None and status["lama"]["state"] == "ready",
+        models={name: model["state"] for name, model in status.items()},
+        model_load_seconds={
+            name: model["load_seconds"] for name, model in status.items() if model["load_seconds"] is not None
+        },
+        startup_seconds=AGENT_INSTANCE.startup_seconds if AGENT_INSTANCE else None,
+        first_request_seconds=AGENT_INSTANCE.first_request_seconds if AGENT_INSTANCE else None,
+    ))
+
+@translator_protocol.on_message(model=MetricsRequest, replies={MetricsResponse})
+async def handle_metrics(ctx: Context, sender: str, msg: MetricsRequest):
+    await ctx.send(sender, MetricsResponse(
+        metrics=METRICS.snapshot(),
+        text=METRICS.render() if msg.include_text else None,
+    ))
+
+@translator_protocol.on_message(
+    model=ArtifactRequest, replies={ArtifactResponse},
+    rate_limit=RateLimit(window_size_minutes=1, max_requests=ARTIFACT_FETCH_PER_MINUTE),
+)
+async def handle_artifact(ctx: Context, sender: str, msg: ArtifactRequest):
+    global AGENT_INSTANCE
+    if not AGENT_INSTANCE:
+        await ctx.send(sender, ArtifactResponse(key=msg.key, offset=msg.offset, error="Agent initialization failed"))
+        return
+    length = min(msg.length or ARTIFACT_FETCH_MAX_BYTES, ARTIFACT_FETCH_MAX_BYTES)
+    try:
+        data, size = await AGENT_INSTANCE.workers.run_thread(
+            "artifact", AGENT_INSTANCE.read_artifact, msg.key, msg.offset, length
+        )
+    except Exception as e:
+        ctx.logger.warning(f"Could not read artifact {msg.key} for {sender}: {e}")
+        await ctx.send(sender, ArtifactResponse(key=msg.key, offset=msg.offset, error=f"Error reading artifact: {e}"))
+        return
+    await ctx.send(sender, ArtifactResponse(
+        key=msg.key,
+        offset=msg.offset,
+        data=base64.b64encode(data).decode("ascii"),
+        total_bytes=size,
+        done=msg.offset + len(data) >= size,
+    ))
 
 @translator_protocol.on_message(model=SchedulePostRequest, replies={SchedulePostResponse})
 async def handle_schedule_post(ctx: Context, sender: str, msg: SchedulePostRequest):
@@ -159,6 +571,17 @@ async def handle_schedule_post(ctx: Context, sender: str, msg: SchedulePostReque
     response = await AGENT_INSTANCE.schedule_posts(msg)
     await ctx.send(sender, response)
 
+@translator_protocol.on_message(model=ScheduleBulkRequest, replies={ScheduleBulkResponse})
+async def handle_schedule_bulk(ctx: Context, sender: str, msg: ScheduleBulkRequest):
+    ctx.logger.info(f"Received request to schedule posts for {len(msg.image_ids)} images from {sender}")
+    global AGENT_INSTANCE
+    if not AGENT_INSTANCE:
+        ctx.logger.error("Agent instance not found")
+        await ctx.send(sender, ScheduleBulkResponse(count=0, error="Agent initialization failed"))
+        return
+    response = await AGENT_INSTANCE.schedule_bulk(msg)
+    await ctx.send(sender, response)
+
 content_translator.include(translator_protocol, publish_manifest=True)
 
 if __name__ == "__main__":
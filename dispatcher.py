@@ -0,0 +1,229 @@
+import os
+import time
+import heapq
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+from models import PostSchedule, Platform
+from storage import ContentStore, to_utc_timestamp
+
+POSTED = "posted"
+FAILED = "failed"
+MISSED = "missed"
+SKIPPED = "skipped"  # Not sent: no real adapter is configured for the platform
+
+# (due, schedule_id, schedule); schedule is None for rows added by id only
+HeapEntry = Tuple[float, int, Optional[PostSchedule]]
+
+
+class PlatformAdapter:
+    """
+    Interface for publishing due posts to a social media platform.
+    """
+    async def publish(self, schedules: List[PostSchedule]) -> List[str]:
+        """
+        Publish a batch of posts for one platform and return a status per post.
+        """
+        raise NotImplementedError
+
+
+class LoggingPlatformAdapter(PlatformAdapter):
+    """
+    Default adapter until real platform APIs are wired in: logs each post and
+    reports it as "skipped", not "posted", since nothing was sent. Skipped rows
+    can be set back to "pending" once a real adapter is configured.
+    """
+    def __init__(self, logger: Optional[logging.Logger] = None):
+        self.logger = logger or logging.getLogger(__name__)
+
+    async def publish(self, schedules: List[PostSchedule]) -> List[str]:
+        for schedule in schedules:
+            self.logger.info(
+                f"Publishing {schedule.image_id} to {schedule.platform.value} in "
+                f"{schedule.target_language.value} (due {schedule.scheduled_time})"
+            )
+        return [SKIPPED for _ in schedules]
+
+
+class FakePlatformAdapter(PlatformAdapter):
+    """
+    Offline adapter for tests: records every published batch.
+    """
+    def __init__(self, status: str = POSTED):
+        self.status = status
+        self.batches: List[List[PostSchedule]] = []
+
+    async def publish(self, schedules: List[PostSchedule]) -> List[str]:
+        self.batches.append(list(schedules))
+        return [self.status for _ in schedules]
+
+
+class PostDispatcher:
+    """
+    Fires pending posts when they are due.
+
+    Pending schedules sit in a min-heap keyed on their UTC due time. The run
+    loop sleeps until the earliest one is due (or a new earlier one is added),
+    pops everything due, publishes it in per-platform batches and writes the
+    resulting statuses back in bulk. Pending schedules are reloaded from the
+    store on startup, so nothing is lost across restarts. Posts more than
+    max_lateness seconds overdue are marked "missed" instead of published. If
+    a batch fails before its statuses are written (e.g. a store error), its
+    posts go back on the heap and are retried after retry_delay seconds.
+    """
+    def __init__(self, store: ContentStore, adapters: Optional[Dict[Platform, PlatformAdapter]] = None,
+                 batch_size: int = 100, max_lateness: Optional[float] = 86400,
+                 logger: Optional[logging.Logger] = None, retry_delay: float = 30):
+        self.store = store
+        self.logger = logger or logging.getLogger(__name__)
+        default_adapter = LoggingPlatformAdapter(self.logger)
+        self.adapters = {platform: default_adapter for platform in Platform}
+        self.adapters.update(adapters or {})
+        self.batch_size = batch_size
+        self.max_lateness = max_lateness
+        self.retry_delay = retry_delay
+        self._heap: List[HeapEntry] = []
+        self._queued = set()
+        self._wakeup = asyncio.Event()
+        self._running = False
+
+    @classmethod
+    def from_env(cls, store: ContentStore, logger: Optional[logging.Logger] = None) -> "PostDispatcher":
+        lateness = float(os.getenv("DISPATCH_MAX_LATENESS_SECONDS", "86400"))
+        return cls(
+            store,
+            batch_size=int(os.getenv("DISPATCH_BATCH_SIZE", "100")),
+            max_lateness=lateness if lateness > 0 else None,
+            logger=logger,
+            retry_delay=float(os.getenv("DISPATCH_RETRY_SECONDS", "30")),
+        )
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def add(self, schedules: Iterable[PostSchedule]):
+        """
+        Queue stored (schedule_id set) pending schedules and wake the loop if one is now earliest.
+        """
+        earliest = self._heap[0][0] if self._heap else None
+        for schedule in schedules:
+            if schedule.schedule_id is None or schedule.post_status != "pending":
+                continue
+            if schedule.schedule_id in self._queued:
+                continue
+            due = to_utc_timestamp(schedule.scheduled_time)
+            heapq.heappush(self._heap, (due, schedule.schedule_id, schedule))
+            self._queued.add(schedule.schedule_id)
+        if self._heap and (earliest is None or self._heap[0][0] < earliest):
+            self._wakeup.set()
+
+    def add_ids(self, due_times: Iterable[float], schedule_ids: Iterable[int]):
+        """
+        Queue stored pending schedules by due time and id only, e.g. a bulk-inserted
+        ScheduleBatch; their rows are read from the store when they fire.
+        """
+        earliest = self._heap[0][0] if self._heap else None
+        for due, schedule_id in zip(due_times, schedule_ids):
+            if schedule_id not in self._queued:
+                heapq.heappush(self._heap, (due, schedule_id, None))
+                self._queued.add(schedule_id)
+        if self._heap and (earliest is None or self._heap[0][0] < earliest):
+            self._wakeup.set()
+
+    def load_pending(self) -> int:
+        """
+        Reload every pending schedule from the store, e.g. after a restart.
+        """
+        before = len(self._heap)
+        self.add(self.store.get_schedules(post_status="pending"))
+        return len(self._heap) - before
+
+    def next_due(self) -> Optional[float]:
+        return self._heap[0][0] if self._heap else None
+
+    def _pop_due(self, now: float) -> List[HeapEntry]:
+        entries = []
+        while self._heap and self._heap[0][0] <= now and len(entries) < self.batch_size:
+            entry = heapq.heappop(self._heap)
+            self._queued.discard(entry[1])
+            entries.append(entry)
+        return entries
+
+    def _requeue(self, entries: List[HeapEntry], retry_at: float):
+        # By id only, so the rows are re-read and any already updated are dropped
+        for due, schedule_id, _ in entries:
+            if schedule_id not in self._queued:
+                heapq.heappush(self._heap, (max(due, retry_at), schedule_id, None))
+                self._queued.add(schedule_id)
+
+    async def dispatch_due(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Publish everything due at `now`, batch by batch. Returns counts per resulting status.
+        """
+        now = time.time() if now is None else now
+        counts: Dict[str, int] = {}
+        while True:
+            entries = self._pop_due(now)
+            if not entries:
+                return counts
+            try:
+                batch_counts = await self._dispatch_entries(entries, now)
+            except Exception:
+                self._requeue(entries, now + self.retry_delay)
+                raise
+            for status, count in batch_counts.items():
+                counts[status] = counts.get(status, 0) + count
+
+    async def _dispatch_entries(self, entries: List[HeapEntry], now: float) -> Dict[str, int]:
+        due = [schedule for _, _, schedule in entries if schedule is not None]
+        missing = [schedule_id for _, schedule_id, schedule in entries if schedule is None]
+        if missing:
+            due.extend(s for s in self.store.get_schedules_by_ids(missing) if s.post_status == "pending")
+        statuses: Dict[str, List[int]] = {}
+        by_platform: Dict[Platform, List[PostSchedule]] = {}
+        for schedule in due:
+            if self.max_lateness is not None and now - to_utc_timestamp(schedule.scheduled_time) > self.max_lateness:
+                statuses.setdefault(MISSED, []).append(schedule.schedule_id)
+            else:
+                by_platform.setdefault(schedule.platform, []).append(schedule)
+        results = await asyncio.gather(*(
+            self.adapters[platform].publish(batch) for platform, batch in by_platform.items()
+        ), return_exceptions=True)
+        for (platform, batch), result in zip(by_platform.items(), results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Publishing to {platform.value} failed: {result}")
+                result = [FAILED for _ in batch]
+            for schedule, status in zip(batch, result):
+                statuses.setdefault(status, []).append(schedule.schedule_id)
+        counts = {}
+        for status, schedule_ids in statuses.items():
+            self.store.update_schedule_status(schedule_ids, status)
+            counts[status] = len(schedule_ids)
+        return counts
+
+    async def run(self):
+        """
+        Dispatch loop: sleep exactly until the next post is due, then fire everything due.
+        """
+        self._running = True
+        while self._running:
+            self._wakeup.clear()
+            next_due = self.next_due()
+            timeout = None if next_due is None else max(0.0, next_due - time.time())
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                    continue  # Woken by an earlier schedule or stop(); recompute
+                except asyncio.TimeoutError:
+                    pass
+            try:
+                counts = await self.dispatch_due()
+            except Exception as e:
+                self.logger.error(f"Error dispatching posts: {e}")
+                continue
+            if counts:
+                self.logger.info(f"Dispatched posts: {counts}")
+
+    def stop(self):
+        self._running = False
+        self._wakeup.set()
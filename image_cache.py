@@ -0,0 +1,207 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+from PIL import Image
+from models import Language
+from ocr import OCRAnalysis
+
+CHUNK_SIZE = 1 << 20
+
+T = TypeVar("T")
+
+
+def hash_image_file(image_path: str) -> str:
+    """
+    SHA-256 of the image bytes, used to identify identical uploads.
+    """
+    digest = hashlib.sha256()
+    with open(image_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def settings_key(*settings: Any) -> str:
+    """
+    Short stable hash of configuration values (dicts, strings, numbers).
+    """
+    payload = json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def params_key(source_language: Language, font_style: Dict[str, str], settings: str = "") -> str:
+    """
+    Short stable hash of the request parameters and settings an output depends on.
+    """
+    return settings_key({"source": source_language.value, "font": font_style, "settings": settings})
+
+
+class ImageResultCache:
+    """
+    Content-addressed cache of per-image pipeline results on disk.
+
+    Entries are keyed by the image hash plus the parameters they depend on,
+    including a settings_key of the configuration that produced them (see
+    ImageProcessor.cache_settings), so changing e.g. OCR_TEXT_CHECK or
+    LANGUAGE_FONTS does not serve results made under the old values:
+    - OCR analysis: hash + source language + OCR settings
+    - inpainted background: hash + source language + OCR and inpainting settings
+    - finished render (its artifact store key) and translated text: hash + target language + params_key
+
+    Files are evicted least recently used first once the directory exceeds max_bytes.
+    Methods are safe to call from several worker threads: entries are written to
+    a temporary file and renamed into place, and an entry evicted between lookup
+    and read counts as a miss.
+    """
+    def __init__(self, directory: str = "image_cache", max_bytes: int = 1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # path -> size, oldest first
+        self._total_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @classmethod
+    def from_env(cls) -> "ImageResultCache":
+        return cls(
+            directory=os.getenv("IMAGE_CACHE_DIR", "image_cache"),
+            max_bytes=int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(1 << 30))),
+        )
+
+    def _load_index(self):
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".part"):
+                os.remove(path)  # Left over from an interrupted write
+            elif os.path.isfile(path):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(files):
+            self._entries[path] = size
+            self._total_bytes += size
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.directory, "_".join(parts))
+
+    def _forget(self, path: str):
+        with self._lock:
+            self._total_bytes -= self._entries.pop(path, 0)
+
+    def _read(self, path: str, reader: Callable[[str], T]) -> Optional[T]:
+        """
+        reader(path) for a cached entry, marking it recently used; None (a miss)
+        if it is not cached or its file is gone by the time it is read.
+        """
+        with self._lock:
+            cached = path in self._entries
+            if cached:
+                self._entries.move_to_end(path)
+        if cached:
+            try:
+                os.utime(path)
+                value = reader(path)
+            except FileNotFoundError:
+                self._forget(path)  # Evicted by another thread, or removed from disk
+            else:
+                with self._lock:
+                    self.hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _write(self, path: str, writer: Callable[[str], Any]):
+        # writer(tmp_path) fills a temporary file that replaces the entry in one step
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        os.close(fd)
+        try:
+            writer(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._add(path)
+
+    def _write_json(self, path: str, data: Any):
+        def write(tmp_path: str):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+        self._write(path, write)
+
+    @staticmethod
+    def _read_json(path: str) -> Any:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _read_image(path: str) -> Image.Image:
+        with Image.open(path) as image:
+            return image.convert("RGB")
+
+    def _add(self, path: str):
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            self._forget(path)  # A rewritten entry evicted by another thread meanwhile
+            return
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(path, 0)
+            self._entries[path] = size
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_path, old_size = self._entries.popitem(last=False)
+                self._total_bytes -= old_size
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+
+    def get_analysis(self, image_hash: str, source_language: Language, settings: str) -> Optional[OCRAnalysis]:
+        data = self._read(self._path(image_hash, source_language.value, settings, "ocr.json"), self._read_json)
+        return None if data is None else OCRAnalysis.from_dict(data)
+
+    def put_analysis(self, image_hash: str, source_language: Language, settings: str, analysis: OCRAnalysis):
+        self._write_json(self._path(image_hash, source_language.value, settings, "ocr.json"), analysis.to_dict())
+
+    def get_background(self, image_hash: str, source_language: Language, settings: str) -> Optional[Image.Image]:
+        return self._read(self._path(image_hash, source_language.value, settings, "background.png"), self._read_image)
+
+    def put_background(self, image_hash: str, source_language: Language, settings: str, background: Image.Image):
+        self._write(
+            self._path(image_hash, source_language.value, settings, "background.png"),
+            lambda tmp_path: background.save(tmp_path, format="PNG"),
+        )
+
+    def get_output(self, image_hash: str, target_language: Language,
+                   params: str) -> Optional[Tuple[str, str]]:
+        """
+        Return (artifact key of the edited image, translated text) for a finished render, if cached.
+        """
+        output = self._read(self._path(image_hash, target_language.value, params, "output.json"), self._read_json)
+        return None if output is None else (output["artifact_key"], output["translated_text"])
+
+    def put_output(self, image_hash: str, target_language: Language, params: str,
+                   artifact_key: str, translated_text: str):
+        """
+        Record a finished render stored in the artifact store under artifact_key.
+        """
+        self._write_json(
+            self._path(image_hash, target_language.value, params, "output.json"),
+            {"artifact_key": artifact_key, "translated_text": translated_text},
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+            }
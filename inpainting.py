@@ -0,0 +1,125 @@
+import os
+from typing import Callable, List, Tuple
+import numpy as np
+from PIL import Image
+
+Box = Tuple[int, int, int, int]  # (left, top, right, bottom)
+
+# model(image, mask) -> inpainted image, e.g. a SimpleLama instance
+Inpainter = Callable[[Image.Image, Image.Image], Image.Image]
+
+INPAINT_MODES = ("auto", "full", "regions")
+
+
+def _overlaps(a: Box, b: Box) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def merge_boxes(boxes: List[Box]) -> List[Box]:
+    """
+    Merge overlapping boxes until none overlap.
+    """
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        result: List[Box] = []
+        for box in boxes:
+            for i, other in enumerate(result):
+                if _overlaps(box, other):
+                    result[i] = (min(box[0], other[0]), min(box[1], other[1]),
+                                 max(box[2], other[2]), max(box[3], other[3]))
+                    merged = True
+                    break
+            else:
+                result.append(box)
+        boxes = result
+    return boxes
+
+
+def mask_regions(mask: np.ndarray, padding: int) -> List[Box]:
+    """
+    Group the masked pixels into padded, non-overlapping rectangles clamped to the image.
+    The padding gives the model surrounding context to fill from.
+    """
+    import cv2
+    height, width = mask.shape[:2]
+    count, _, stats, _ = cv2.connectedComponentsWithStats((mask > 0).astype(np.uint8), connectivity=8)
+    boxes = []
+    for label in range(1, count):  # label 0 is the background
+        x, y, w, h = stats[label][:4]
+        boxes.append((
+            max(0, int(x) - padding),
+            max(0, int(y) - padding),
+            min(width, int(x + w) + padding),
+            min(height, int(y + h) + padding),
+        ))
+    return merge_boxes(boxes)
+
+
+def region_coverage(regions: List[Box], width: int, height: int) -> float:
+    """
+    Fraction of the image area covered by the (non-overlapping) regions.
+    """
+    area = sum((r[2] - r[0]) * (r[3] - r[1]) for r in regions)
+    return area / float(max(1, width * height))
+
+
+def inpaint_full(model: Inpainter, image: Image.Image, mask: Image.Image) -> Image.Image:
+    result = model(image, mask)
+    # LaMa pads its input to a multiple of 8; trim back to the original size
+    if result.size != image.size:
+        result = result.crop((0, 0) + image.size)
+    return result
+
+
+def inpaint_regions(model: Inpainter, image: Image.Image, mask: Image.Image,
+                    regions: List[Box]) -> Image.Image:
+    """
+    Inpaint each region crop individually and paste only its masked pixels back.
+    """
+    result = image.copy()
+    for region in regions:
+        crop_mask = mask.crop(region)
+        filled = inpaint_full(model, image.crop(region), crop_mask)
+        result.paste(filled, region[:2], crop_mask)
+    return result
+
+
+def inpaint(model: Inpainter, image: Image.Image, mask: Image.Image, mode: str = "auto",
+            padding: int = 32, full_frame_coverage: float = 0.35) -> Image.Image:
+    """
+    Inpaint either the full frame or just the padded regions around the masked boxes.
+
+    In "auto" mode, region cropping is used unless the regions cover more than
+    full_frame_coverage of the image, where one full-frame pass is cheaper.
+    """
+    if mode not in INPAINT_MODES:
+        raise ValueError(f"Unknown inpaint mode '{mode}', expected one of {INPAINT_MODES}")
+    mask_array = np.array(mask)
+    if not mask_array.any():
+        return image.copy()
+    if mode == "full":
+        return inpaint_full(model, image, mask)
+    regions = mask_regions(mask_array, padding)
+    if mode == "auto" and region_coverage(regions, image.width, image.height) > full_frame_coverage:
+        return inpaint_full(model, image, mask)
+    return inpaint_regions(model, image, mask, regions)
+
+
+class InpaintSettings:
+    """
+    Inpainting mode and region parameters, read from the environment.
+    """
+    def __init__(self, mode: str = "auto", padding: int = 32, full_frame_coverage: float = 0.35):
+        self.mode = mode
+        self.padding = padding
+        self.full_frame_coverage = full_frame_coverage
+
+    @classmethod
+    def from_env(cls) -> "InpaintSettings":
+        return cls(
+            mode=os.getenv("INPAINT_MODE", "auto"),
+            padding=int(os.getenv("INPAINT_REGION_PADDING", "32")),
+            full_frame_coverage=float(os.getenv("INPAINT_FULL_FRAME_COVERAGE", "0.35")),
+        )
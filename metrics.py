@@ -0,0 +1,282 @@
+import os
+import time
+import bisect
+import cProfile
+import pstats
+import threading
+import contextvars
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Seconds; covers a cache hit (~1ms) up to a slow LaMa pass on CPU
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# From Python 3.12 cProfile uses the interpreter's single profiler slot, so only
+# one profiler may be enabled at a time in the whole process
+_PROFILER_LOCK = threading.Lock()
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram of one labelled series, as Prometheus expects.
+    """
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Upper bound of the bucket holding the q-quantile; None if empty or in +Inf.
+        """
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+
+class Metrics:
+    """
+    In-process counters and latency histograms for the image pipeline.
+
+    Series are identified by a metric name plus labels, e.g.
+    stage_seconds{stage="ocr"}. render() produces the Prometheus text format
+    and snapshot() a plain dict for the metrics message. Collectors registered
+    with add_collector() are called at render time for gauges that already
+    live elsewhere, such as cache sizes.
+    """
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Callable[[], Dict[str, float]]] = []
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels: str):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, name: str, trace_stage: Optional[str] = None, **labels: str) -> Iterator[None]:
+        """
+        Observe the duration of the block; with trace_stage, also add it to the current request's trace.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe(name, elapsed, **labels)
+            trace = CURRENT_TRACE.get()
+            if trace is not None and trace_stage:
+                trace.add(trace_stage, elapsed)
+
+    def add_collector(self, collector: Callable[[], Dict[str, float]]):
+        """
+        Register a callable returning {gauge_name: value}, read on every render.
+        """
+        self._collectors.append(collector)
+
+    def _gauges(self) -> Dict[str, float]:
+        gauges = {}
+        for collector in self._collectors:
+            try:
+                gauges.update(collector())
+            except Exception:
+                pass  # A closed cache must not break the metrics endpoint
+        return gauges
+
+    def render(self) -> str:
+        """
+        All series in the Prometheus text exposition format (version 0.0.4).
+        """
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        for name, value in sorted(self._gauges().items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Flat view for messages: counters by series, and count/mean/p50/p95 per histogram series.
+        """
+        result = {}
+        with self._lock:
+            for name, series in self._counters.items():
+                for key, value in series.items():
+                    result[f"{name}{_format_labels(key)}"] = {"value": value}
+            for name, series in self._histograms.items():
+                for key, histogram in series.items():
+                    result[f"{name}{_format_labels(key)}"] = {
+                        "count": histogram.count,
+                        "mean_ms": histogram.sum / histogram.count * 1000 if histogram.count else 0.0,
+                        "p50_ms": _ms(histogram.quantile(0.5)),
+                        "p95_ms": _ms(histogram.quantile(0.95)),
+                    }
+        for name, value in self._gauges().items():
+            result[name] = {"value": value}
+        return result
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Serve render() at /metrics on a background thread for Prometheus to scrape.
+        Binds to loopback unless another host is given (e.g. "0.0.0.0").
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes every few seconds would flood the agent log
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else seconds * 1000
+
+
+class RequestTrace:
+    """
+    Timings of one request, summed per stage, plus an optional profile.
+
+    While a trace is set as CURRENT_TRACE, every stage run on the WorkerPool
+    (and blocks timed with Metrics.time(trace_stage=...)) is also added here. With profile=True,
+    stages run on the thread pool are profiled with cProfile and merged into
+    one pstats file (open with snakeviz, or `python -m pstats`). Only one stage
+    in the process is profiled at a time; stages running alongside it, or while
+    another profiling tool is active, run unprofiled and are counted in
+    unprofiled_stages.
+    """
+    def __init__(self, profile: bool = False):
+        self.profile = profile
+        self.stage_seconds: Dict[str, float] = {}
+        self.profiles: List[cProfile.Profile] = []
+        self.unprofiled_stages = 0
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    def run_profiled(self, fn: Callable, *args):
+        if not _PROFILER_LOCK.acquire(blocking=False):
+            return self._run_unprofiled(fn, *args)
+        try:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # "Another profiling tool is already active", e.g. a debugger or coverage
+                return self._run_unprofiled(fn, *args)
+            try:
+                return fn(*args)
+            finally:
+                profiler.disable()
+                with self._lock:
+                    self.profiles.append(profiler)
+        finally:
+            _PROFILER_LOCK.release()
+
+    def _run_unprofiled(self, fn: Callable, *args):
+        with self._lock:
+            self.unprofiled_stages += 1
+        return fn(*args)
+
+    def timings_ms(self) -> Dict[str, float]:
+        with self._lock:
+            return {stage: round(seconds * 1000, 3) for stage, seconds in self.stage_seconds.items()}
+
+    def dump_profile(self, path: str) -> Optional[str]:
+        with self._lock:
+            profiles = list(self.profiles)
+        if not profiles:
+            return None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        stats = pstats.Stats(profiles[0])
+        for profiler in profiles[1:]:
+            stats.add(profiler)
+        stats.dump_stats(path)
+        return path
+
+
+CURRENT_TRACE: "contextvars.ContextVar[Optional[RequestTrace]]" = contextvars.ContextVar(
+    "current_trace", default=None
+)
+
+METRICS = Metrics()
+METRICS.describe("stage_seconds", "Time spent running a pipeline stage")
+METRICS.describe("stage_queue_wait_seconds", "Time a stage waited for a free worker")
+METRICS.describe("translate_language_seconds", "Time to translate one image's segments into one language")
+METRICS.describe("request_seconds", "End-to-end process_image latency")
+METRICS.describe("requests_total", "Processed image requests by outcome")
+METRICS.describe("cache_lookups_total", "Image result cache lookups by kind and result")
@@ -0,0 +1,106 @@
+import time
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class ModelRegistry:
+    """
+    Loads heavy models lazily, once per process, and reports their readiness.
+
+    A model is loaded on the first get() or by warm(), which loads it on a
+    background thread so the agent can accept messages in the meantime. Load
+    time and failures are recorded for status(). Because models live in module
+    state, a worker process forked after a load shares the weights with its
+    parent copy-on-write instead of loading them again.
+    """
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._loading: Dict[str, threading.Thread] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str) -> Any:
+        """
+        Return the loaded model, loading it now if needed. Raises if loading failed.
+        """
+        if name in self._models:
+            return self._models[name]
+        if name not in self._loaders:
+            raise KeyError(f"No model registered as '{name}'")
+        with self._locks[name]:
+            if name in self._errors:
+                raise Exception(f"Failed to load model '{name}': {self._errors[name]}")
+            if name not in self._models:
+                start = time.perf_counter()
+                try:
+                    self._models[name] = self._loaders[name]()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise Exception(f"Failed to load model '{name}': {e}")
+                finally:
+                    self._load_seconds[name] = time.perf_counter() - start
+        return self._models[name]
+
+    def get_or_none(self, name: str) -> Optional[Any]:
+        try:
+            return self.get(name)
+        except Exception:
+            return None
+
+    def warm(self, name: str) -> threading.Thread:
+        """
+        Start loading the model on a background thread, if not loaded or loading already.
+        """
+        with self._lock:
+            thread = self._loading.get(name)
+            if thread is None:
+                thread = threading.Thread(
+                    target=self.get_or_none, args=(name,), name=f"warm-{name}", daemon=True
+                )
+                self._loading[name] = thread
+                thread.start()
+        return thread
+
+    def is_ready(self, name: str) -> bool:
+        return name in self._models
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-model state ("ready", "loading", "failed" or "not_loaded") and load time.
+        """
+        result = {}
+        for name in self._loaders:
+            if name in self._models:
+                state = "ready"
+            elif name in self._errors:
+                state = "failed"
+            elif name in self._loading and self._loading[name].is_alive():
+                state = "loading"
+            else:
+                state = "not_loaded"
+            result[name] = {
+                "state": state,
+                "load_seconds": self._load_seconds.get(name),
+                "error": self._errors.get(name),
+            }
+        return result
+
+
+def _load_simple_lama():
+    import torch
+    from simple_lama_inpainting import SimpleLama
+    model = SimpleLama(device="cpu")  # Force CPU usage
+    print("SimpleLaMa initialized successfully on CPU with PyTorch version:", torch.__version__)
+    return model
+
+
+MODEL_REGISTRY = ModelRegistry()
+MODEL_REGISTRY.register("lama", _load_simple_lama)
@@ -33,6 +33,13 @@ class Platform(str, Enum):
     TWITTER = "twitter"
     FACEBOOK = "facebook"
 
+class Priority(str, Enum):
+    """
+    Enum representing admission priority classes for image requests.
+    """
+    INTERACTIVE = "interactive"  # A user is waiting on the result
+    BULK = "bulk"  # Backfills and batches; served when interactive work leaves room
+
 class ImageContent(Model):
     image_id: str
     image_path: str
@@ -52,15 +59,22 @@ class TranslatedContent(Model):
     image_id: str
     target_language: Language
     translated_text: str
-    edited_image_path: Optional[str] = None
+    edited_image_path: Optional[str] = None  # Only set when the artifact store is on the agent's disk
     timestamp: str
+    edited_image_key: Optional[str] = None  # Content-addressed artifact store key
+    edited_image_url: Optional[str] = None  # e.g. artifact://<key> or s3://bucket/<key>
 
     @classmethod
-    def create(cls, image_id: str, target_language: Language, translated_text: str):
+    def create(cls, image_id: str, target_language: Language, translated_text: str,
+               edited_image_path: Optional[str] = None, edited_image_key: Optional[str] = None,
+               edited_image_url: Optional[str] = None):
         return cls(
             image_id=image_id,
             target_language=target_language,
             translated_text=translated_text,
+            edited_image_path=edited_image_path,
+            edited_image_key=edited_image_key,
+            edited_image_url=edited_image_url,
             timestamp=datetime.utcnow().isoformat()
         )
 
@@ -74,15 +88,22 @@ class PostSchedule(Model):
     time_zone: TimeZone
     scheduled_time: str  # ISO format
     post_status: str = "pending"
+    schedule_id: Optional[int] = None  # Assigned when stored
 
 class ProcessImageRequest(Model):
     """
     Request model for processing an image (extract, translate, edit).
+    Exactly one image source is used, in order: image_bytes, image_url, image_path.
     """
-    image_path: str
+    image_path: Optional[str] = None  # Path on the agent's filesystem
     source_language: Language
     target_languages: List[Language]
     font_style: Optional[Dict[str, str]] = None  # e.g., {"family": "Arial", "size": "24", "color": "#000000"}
+    image_bytes: Optional[str] = None  # Base64-encoded image content
+    image_url: Optional[str] = None  # http(s) URL, or artifact://<key> / s3:// URL returned by the agent
+    profile: bool = False  # Run this request's stages under cProfile and return the .prof path
+    request_id: Optional[str] = None  # Client-chosen id, echoed in the response and used by CancelRequest
+    priority: Priority = Priority.INTERACTIVE
 
 class ProcessImageResponse(Model):
     """
@@ -92,6 +113,29 @@ class ProcessImageResponse(Model):
     original_content: ImageContent
     translated_contents: List[TranslatedContent]
     error: Optional[str] = None  # Add error field
+    timings_ms: Optional[Dict[str, float]] = None  # Time per pipeline stage, e.g. {"ocr": 812.4, "translate_es": 95.1}
+    profile_path: Optional[str] = None  # pstats file on the agent, for profiled requests
+    request_id: Optional[str] = None  # Echoed from the request
+    retry_after_seconds: Optional[float] = None  # Set when the request was rejected because the agent is saturated
+
+class ProcessImageBatchRequest(Model):
+    """
+    Request model for processing many images in one message.
+    """
+    requests: List[ProcessImageRequest]
+    batch_id: Optional[str] = None  # Echoed in every response; generated if omitted
+
+class ProcessImageBatchResponse(Model):
+    """
+    Response model streamed once per finished image of a batch.
+    """
+    batch_id: str
+    index: int  # Position of the image in ProcessImageBatchRequest.requests
+    total: int
+    completed: int  # Images finished so far, including this one
+    result: Optional[ProcessImageResponse] = None
+    error: Optional[str] = None  # Per-item error; the rest of the batch carries on
+    done: bool = False  # True on the last response of the batch
 
 class SchedulePostRequest(Model):
     """
@@ -106,4 +150,86 @@ class SchedulePostResponse(Model):
     """
     Response model for scheduled posts.
     """
-    schedules: List[PostSchedule]
\ No newline at end of file
+    schedules: List[PostSchedule]
+
+class ScheduleBulkRequest(Model):
+    """
+    Request model for scheduling posts for many images at once.
+    """
+    image_ids: List[str]
+    platforms: List[Platform]
+    language_time_zones: Dict[Language, TimeZone]
+    optimal_time: str = "18:00"
+    spread_minutes: int = 0  # Spread posts of a time zone over this window after optimal_time
+    slot_minutes: int = 1  # Spacing between spread slots
+
+class ScheduleBulkResponse(Model):
+    """
+    Response model for bulk scheduling; schedules are stored, not echoed back.
+    """
+    count: int
+    first_schedule_id: Optional[int] = None  # Ids are contiguous from here
+    error: Optional[str] = None
+
+class HealthRequest(Model):
+    """
+    Request model for agent readiness.
+    """
+    pass
+
+class HealthResponse(Model):
+    """
+    Response model for agent readiness, model load state and startup timings.
+    """
+    ready: bool
+    models: Dict[str, str]  # model name -> "ready", "loading", "failed" or "not_loaded"
+    model_load_seconds: Dict[str, float]
+    startup_seconds: Optional[float] = None  # Process start until the agent was reachable
+    first_request_seconds: Optional[float] = None  # Latency of the first processed image
+
+class MetricsRequest(Model):
+    """
+    Request model for the agent's pipeline metrics.
+    """
+    include_text: bool = False  # Also return the Prometheus text exposition
+
+class MetricsResponse(Model):
+    """
+    Response model with counters and per-stage latency summaries.
+    """
+    metrics: Dict[str, Dict[str, Optional[float]]]  # e.g. {'stage_seconds{stage="ocr"}': {"count": 3, "p95_ms": 1000.0, ...}}
+    text: Optional[str] = None
+
+class CancelRequest(Model):
+    """
+    Request model for cancelling a queued or running ProcessImageRequest sent by the same agent.
+    """
+    request_id: str
+
+class CancelResponse(Model):
+    """
+    Response model for a cancellation; the cancelled request is answered with an error.
+    """
+    request_id: str
+    cancelled: bool  # False when the request was unknown or had already finished
+
+class ArtifactRequest(Model):
+    """
+    Request model for part of an artifact, e.g. a rendered image, by its key;
+    for clients that cannot read the agent's artifact store themselves.
+    """
+    key: str
+    offset: int = 0
+    length: Optional[int] = None  # Capped by the agent's ARTIFACT_FETCH_MAX_BYTES
+
+class ArtifactResponse(Model):
+    """
+    Response model with one part of an artifact; request the next part from
+    offset + the decoded length until done.
+    """
+    key: str
+    offset: int
+    data: str = ""  # Base64-encoded bytes
+    total_bytes: int = 0
+    done: bool = True
+    error: Optional[str] = None
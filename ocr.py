@@ -0,0 +1,210 @@
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Tesseract reports one row per page/block/paragraph/line/word; only words carry text
+TESSERACT_WORD_LEVEL = 5
+
+Box = Tuple[int, int, int, int]  # (left, top, right, bottom)
+
+
+def union_box(boxes: List[Box]) -> Box:
+    """
+    Smallest box containing every box in the list.
+    """
+    return (
+        min(b[0] for b in boxes),
+        min(b[1] for b in boxes),
+        max(b[2] for b in boxes),
+        max(b[3] for b in boxes),
+    )
+
+
+@dataclass
+class OCRWord:
+    """
+    A single word detected by Tesseract, with its bounding box and confidence.
+    """
+    text: str
+    left: int
+    top: int
+    width: int
+    height: int
+    conf: float
+    block_num: int
+    par_num: int
+    line_num: int
+
+    @property
+    def box(self) -> Box:
+        return (self.left, self.top, self.left + self.width, self.top + self.height)
+
+
+@dataclass
+class OCRLine:
+    """
+    Words sharing the same Tesseract block, paragraph and line number.
+    """
+    block_num: int
+    par_num: int
+    line_num: int
+    words: List[OCRWord] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return " ".join(word.text for word in self.words)
+
+    @property
+    def box(self) -> Box:
+        return union_box([word.box for word in self.words])
+
+
+@dataclass
+class OCRBlock:
+    """
+    Lines belonging to the same Tesseract block, in reading order.
+    """
+    block_num: int
+    lines: List[OCRLine] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        paragraphs: List[List[str]] = []
+        last_par = None
+        for line in self.lines:
+            if line.par_num != last_par:
+                paragraphs.append([])
+                last_par = line.par_num
+            paragraphs[-1].append(line.text)
+        return "\n\n".join("\n".join(lines) for lines in paragraphs)
+
+    @property
+    def segment_text(self) -> str:
+        """
+        The block as a single translation segment, with line breaks collapsed.
+        """
+        return " ".join(line.text for line in self.lines)
+
+    @property
+    def box(self) -> Box:
+        return union_box([line.box for line in self.lines])
+
+
+@dataclass
+class OCRAnalysis:
+    """
+    Result of a single OCR pass over an image.
+
+    Holds every detected word with its box and confidence, grouped into lines
+    and blocks. The extracted text, the inpainting mask and the text layout for
+    each target language are all derived from this one object, so Tesseract
+    only runs once per image.
+    """
+    width: int
+    height: int
+    language: str
+    words: List[OCRWord] = field(default_factory=list)
+
+    @classmethod
+    def from_tesseract_data(cls, data: Dict[str, list], width: int, height: int,
+                            language: str) -> "OCRAnalysis":
+        """
+        Build an analysis from the dict returned by pytesseract.image_to_data.
+        """
+        words = []
+        for i in range(len(data["text"])):
+            if int(data["level"][i]) != TESSERACT_WORD_LEVEL:
+                continue
+            text = str(data["text"][i]).strip()
+            if not text:
+                continue
+            words.append(OCRWord(
+                text=text,
+                left=int(data["left"][i]),
+                top=int(data["top"][i]),
+                width=int(data["width"][i]),
+                height=int(data["height"][i]),
+                conf=float(data["conf"][i]),
+                block_num=int(data["block_num"][i]),
+                par_num=int(data["par_num"][i]),
+                line_num=int(data["line_num"][i]),
+            ))
+        return cls(width=width, height=height, language=language, words=words)
+
+    def rescaled(self, width: int, height: int) -> "OCRAnalysis":
+        """
+        The same analysis with boxes mapped onto an image of the given size, e.g.
+        from a downscaled OCR pass back to the original resolution.
+        """
+        if (width, height) == (self.width, self.height):
+            return self
+        sx, sy = width / self.width, height / self.height
+        return OCRAnalysis(width=width, height=height, language=self.language, words=[
+            OCRWord(
+                text=word.text,
+                left=int(word.left * sx),
+                top=int(word.top * sy),
+                width=max(1, round(word.width * sx)),
+                height=max(1, round(word.height * sy)),
+                conf=word.conf,
+                block_num=word.block_num,
+                par_num=word.par_num,
+                line_num=word.line_num,
+            ) for word in self.words
+        ])
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "OCRAnalysis":
+        return cls(
+            width=data["width"],
+            height=data["height"],
+            language=data["language"],
+            words=[OCRWord(**word) for word in data["words"]],
+        )
+
+    @property
+    def lines(self) -> List[OCRLine]:
+        lines: Dict[Tuple[int, int, int], OCRLine] = {}
+        for word in self.words:
+            key = (word.block_num, word.par_num, word.line_num)
+            if key not in lines:
+                lines[key] = OCRLine(word.block_num, word.par_num, word.line_num)
+            lines[key].words.append(word)
+        return list(lines.values())
+
+    @property
+    def blocks(self) -> List[OCRBlock]:
+        blocks: Dict[int, OCRBlock] = {}
+        for line in self.lines:
+            if line.block_num not in blocks:
+                blocks[line.block_num] = OCRBlock(line.block_num)
+            blocks[line.block_num].lines.append(line)
+        return list(blocks.values())
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(block.text for block in self.blocks)
+
+    @property
+    def segments(self) -> List[str]:
+        """
+        One translation segment per block, in reading order.
+        """
+        return [block.segment_text for block in self.blocks]
+
+    def confident_words(self, min_conf: float) -> List[OCRWord]:
+        """
+        Words whose Tesseract confidence is strictly above min_conf.
+        """
+        return [word for word in self.words if word.conf > min_conf]
+
+    def first_word_position(self, min_conf: float = 0) -> Optional[Tuple[int, int]]:
+        """
+        Top-left corner of the first confident word, in reading order.
+        """
+        for word in self.words:
+            if word.conf > min_conf:
+                return (word.left, word.top)
+        return None
@@ -0,0 +1,194 @@
+import os
+import queue
+import logging
+import threading
+from functools import lru_cache
+from typing import Dict, Optional
+import numpy as np
+from PIL import Image
+
+# Columns of Tesseract's TSV output, as returned by pytesseract.image_to_data
+TSV_COLUMNS = ("level", "page_num", "block_num", "par_num", "line_num", "word_num",
+               "left", "top", "width", "height", "conf", "text")
+
+logger = logging.getLogger(__name__)
+
+
+def parse_tsv(tsv: str) -> Dict[str, list]:
+    """
+    Tesseract TSV text (with or without the header row) as a column dict.
+    """
+    data: Dict[str, list] = {column: [] for column in TSV_COLUMNS}
+    for row in tsv.splitlines():
+        fields = row.split("\t", len(TSV_COLUMNS) - 1)
+        if len(fields) < len(TSV_COLUMNS) - 1 or fields[0] == "level":
+            continue
+        fields += [""] * (len(TSV_COLUMNS) - len(fields))
+        for column, value in zip(TSV_COLUMNS, fields):
+            if column == "text":
+                data[column].append(value)
+            elif column == "conf":
+                data[column].append(float(value))
+            else:
+                data[column].append(int(value))
+    return data
+
+
+class OCRBackend:
+    """
+    Interface for OCR engines used by ImageProcessor.analyze_image.
+    """
+    def image_to_data(self, image: np.ndarray, lang: str) -> Dict[str, list]:
+        """
+        Words with boxes and confidences, in the column layout of pytesseract.image_to_data.
+        """
+        raise NotImplementedError
+
+    def warm(self, lang: str):
+        """
+        Prepare the engine for a language ahead of the first request.
+        """
+
+
+class PytesseractBackend(OCRBackend):
+    """
+    Runs the tesseract executable once per call through pytesseract. Works
+    anywhere tesseract is installed, but pays for a process spawn, a temporary
+    image file and a traineddata load on every call.
+    """
+    def __init__(self, tesseract_cmd: Optional[str] = None, tessdata_prefix: Optional[str] = None):
+        self.tesseract_cmd = tesseract_cmd
+        self.tessdata_prefix = tessdata_prefix
+        self._pytesseract = None
+
+    @property
+    def pytesseract(self):
+        # Imported on first use, so code paths that only schedule posts never load it
+        if self._pytesseract is None:
+            import pytesseract
+            if self.tesseract_cmd:
+                pytesseract.pytesseract.tesseract_cmd = self.tesseract_cmd
+            if self.tessdata_prefix:
+                os.environ["TESSDATA_PREFIX"] = self.tessdata_prefix
+            self._pytesseract = pytesseract
+        return self._pytesseract
+
+    def image_to_data(self, image: np.ndarray, lang: str) -> Dict[str, list]:
+        pytesseract = self.pytesseract
+        return pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT)
+
+
+class TesserocrBackend(OCRBackend):
+    """
+    Calls libtesseract in-process through tesserocr, keeping initialized engines
+    for reuse.
+
+    Engines are pooled per language: a call borrows an idle engine for its
+    language, creating one if fewer than engines_per_language exist, and returns
+    it afterwards, so traineddata is loaded once per engine rather than per call.
+    tesserocr releases the GIL while recognizing, so worker threads holding
+    different engines run in parallel. Languages whose engine fails to
+    initialize (e.g. missing traineddata) go to `fallback` if one is given.
+    """
+    def __init__(self, tessdata_prefix: Optional[str] = None, engines_per_language: int = 4,
+                 fallback: Optional[OCRBackend] = None):
+        import tesserocr
+        self.tesserocr = tesserocr
+        self.tessdata_prefix = tessdata_prefix
+        self.engines_per_language = max(1, engines_per_language)
+        self.fallback = fallback
+        self._idle: Dict[str, "queue.Queue"] = {}
+        self._created: Dict[str, int] = {}
+        self._failed: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _create_engine(self, lang: str):
+        kwargs = {"lang": lang}
+        if self.tessdata_prefix:
+            kwargs["path"] = self.tessdata_prefix.rstrip("/\\") + os.sep
+        return self.tesserocr.PyTessBaseAPI(**kwargs)
+
+    def _acquire(self, lang: str):
+        with self._lock:
+            idle = self._idle.setdefault(lang, queue.Queue())
+            try:
+                return idle.get_nowait()
+            except queue.Empty:
+                pass
+            create = self._created.get(lang, 0) < self.engines_per_language
+            if create:
+                self._created[lang] = self._created.get(lang, 0) + 1
+        if not create:
+            return idle.get()  # Every engine for this language is busy; wait for one
+        try:
+            return self._create_engine(lang)
+        except Exception:
+            with self._lock:
+                self._created[lang] -= 1
+            raise
+
+    def _release(self, lang: str, engine):
+        engine.Clear()
+        self._idle[lang].put(engine)
+
+    def image_to_data(self, image: np.ndarray, lang: str) -> Dict[str, list]:
+        if lang in self._failed and self.fallback is not None:
+            return self.fallback.image_to_data(image, lang)
+        try:
+            engine = self._acquire(lang)
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            self._failed[lang] = str(e)
+            logger.warning(f"tesserocr could not load '{lang}' ({e}); using the fallback OCR backend")
+            return self.fallback.image_to_data(image, lang)
+        try:
+            engine.SetImage(Image.fromarray(image))
+            return parse_tsv(engine.GetTSVText(0))
+        finally:
+            self._release(lang, engine)
+
+    def warm(self, lang: str):
+        try:
+            self._release(lang, self._acquire(lang))
+        except Exception as e:
+            logger.warning(f"Could not warm tesserocr for '{lang}': {e}")
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                while not idle.empty():
+                    idle.get_nowait().End()
+            self._idle.clear()
+            self._created.clear()
+
+
+def ocr_backend_from_env() -> OCRBackend:
+    """
+    OCR_BACKEND=auto (tesserocr when installed, else pytesseract) | tesserocr | pytesseract.
+    TESSERACT_CMD and TESSDATA_PREFIX locate the executable and traineddata when
+    they are not on the default search path.
+    """
+    choice = os.getenv("OCR_BACKEND", "auto")
+    tessdata_prefix = os.getenv("TESSDATA_PREFIX") or None
+    fallback = PytesseractBackend(os.getenv("TESSERACT_CMD") or None, tessdata_prefix)
+    if choice == "pytesseract":
+        return fallback
+    try:
+        return TesserocrBackend(
+            tessdata_prefix=tessdata_prefix,
+            engines_per_language=int(os.getenv("OCR_ENGINES_PER_LANGUAGE", str(min(4, os.cpu_count() or 1)))),
+            fallback=fallback,
+        )
+    except ImportError:
+        if choice == "tesserocr":
+            raise
+        return fallback
+
+
+@lru_cache(maxsize=1)
+def default_ocr_backend() -> OCRBackend:
+    """
+    Shared backend for the process, so every ImageProcessor draws from one engine pool.
+    """
+    return ocr_backend_from_env()
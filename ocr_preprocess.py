@@ -0,0 +1,109 @@
+import os
+from typing import Tuple
+import numpy as np
+from PIL import Image
+
+
+class OCRSettings:
+    """
+    How images are prepared for Tesseract, read from the environment like InpaintSettings.
+
+    target_long_edge: images are resized so their long edge is at most this
+        many pixels (and, with max_upscale > 1, small images are enlarged
+        towards it). Boxes are mapped back to the original resolution.
+    binarize: threshold the grayscale image into dark text on a light
+        background, which Tesseract reads best.
+    text_check: before running Tesseract, look for text-like shapes at the
+        resolution it would see and skip OCR when there are none.
+    """
+    def __init__(self, target_long_edge: int = 2000, max_upscale: float = 1.0,
+                 binarize: bool = True, text_check: bool = True):
+        self.target_long_edge = target_long_edge
+        self.max_upscale = max_upscale
+        self.binarize = binarize
+        self.text_check = text_check
+
+    @classmethod
+    def from_env(cls) -> "OCRSettings":
+        return cls(
+            target_long_edge=int(os.getenv("OCR_TARGET_LONG_EDGE", "2000")),
+            max_upscale=float(os.getenv("OCR_MAX_UPSCALE", "1.0")),
+            binarize=os.getenv("OCR_BINARIZE", "1") == "1",
+            text_check=os.getenv("OCR_TEXT_CHECK", "1") == "1",
+        )
+
+
+def to_grayscale(image: Image.Image) -> np.ndarray:
+    import cv2
+    return cv2.cvtColor(np.asarray(image.convert("RGB")), cv2.COLOR_RGB2GRAY)
+
+
+def resize_long_edge(gray: np.ndarray, target_long_edge: int, max_upscale: float = 1.0) -> Tuple[np.ndarray, float]:
+    """
+    Resize so the long edge is target_long_edge (enlarging by at most max_upscale).
+    Returns the resized array and the scale applied.
+    """
+    import cv2
+    height, width = gray.shape[:2]
+    scale = min(target_long_edge / max(height, width), max_upscale)
+    if abs(scale - 1.0) < 0.01:
+        return gray, 1.0
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(gray, size, interpolation=interpolation), scale
+
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    """
+    Dark text on a white background. Polarity comes from a global Otsu split:
+    when the light class is the minority (light text on a dark or saturated
+    background) the image is inverted first. The threshold itself is local
+    (Gaussian adaptive over ~1/8 of the long edge), so skies and other gradients
+    stay white instead of turning into large black areas.
+    """
+    import cv2
+    threshold, _ = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    if np.count_nonzero(gray > threshold) < gray.size // 2:
+        gray = 255 - gray
+    block = max(15, (max(gray.shape[:2]) // 8) | 1)
+    return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block, 15)
+
+
+def prepare_for_ocr(image: Image.Image, settings: OCRSettings) -> Tuple[np.ndarray, float]:
+    """
+    Grayscale, resize and (optionally) binarize the image. Returns the array for
+    Tesseract and the scale from original to OCR coordinates.
+    """
+    gray, scale = resize_long_edge(to_grayscale(image), settings.target_long_edge, settings.max_upscale)
+    if settings.binarize:
+        gray = binarize(gray)
+    return gray, scale
+
+
+def has_text_candidates(image: Image.Image, long_edge: int = 2000, min_glyph_height: int = 6,
+                        min_candidates: int = 2, min_contrast: float = 16) -> bool:
+    """
+    Cheap check for anything that could be text: strong edges grouped into
+    glyph-sized blobs on a grayscale copy at long_edge, which should be the
+    resolution Tesseract sees. Glyphs count from min_glyph_height pixels at that
+    resolution, below what Tesseract can read, so small captions on large
+    frames still pass. It is tuned to err towards True; a False means OCR would
+    almost certainly find nothing.
+    """
+    import cv2
+    gray, _ = resize_long_edge(to_grayscale(image), long_edge)
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, kernel)
+    threshold, edges = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    if threshold < min_contrast:
+        return False  # Flat or blurry image: no edge stands out
+    count, _, stats, _ = cv2.connectedComponentsWithStats(edges, connectivity=8)
+    height = gray.shape[0]
+    min_height, max_height = min_glyph_height, height // 2
+    candidates = 0
+    for x, y, w, h, area in stats[1:]:
+        if min_height <= h <= max_height and 0.05 <= w / h <= 20 and area >= 0.1 * w * h:
+            candidates += 1
+            if candidates >= min_candidates:
+                return True
+    return False
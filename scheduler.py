@@ -1,37 +1,121 @@
-from datetime import datetime, timedelta
-import pytz
+from datetime import datetime, date, time, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
+from zoneinfo import ZoneInfo
 from models import PostSchedule, Platform, Language, TimeZone
 
+
+@lru_cache(maxsize=None)
+def get_zone(time_zone: TimeZone) -> ZoneInfo:
+    """
+    Resolve a TimeZone once; later calls return the cached ZoneInfo.
+    """
+    return ZoneInfo(time_zone.value)
+
+
+def local_time_to_utc(day: date, hour: int, minute: int, zone: ZoneInfo) -> float:
+    """
+    POSIX timestamp of a wall-clock time in the zone, with the offset in effect
+    on that day. Times skipped by a DST jump resolve to the post-jump instant.
+    """
+    local = datetime.combine(day, time(hour, minute), tzinfo=zone)
+    return local.astimezone(timezone.utc).timestamp()
+
+
+@lru_cache(maxsize=4096)
+def format_local_time(timestamp: float, time_zone: TimeZone) -> str:
+    """
+    ISO time in the zone, e.g. 2025-05-04T18:00:00+02:00. Cached because a
+    batch repeats the same few (slot, zone) pairs many times.
+    """
+    return datetime.fromtimestamp(timestamp, get_zone(time_zone)).isoformat()
+
+
+class ScheduleBatch:
+    """
+    Schedules in columnar form: one list per PostSchedule field, row i across
+    all lists. PostSchedule models are only built when iterated or indexed.
+    """
+    def __init__(self):
+        self.image_ids: List[str] = []
+        self.platforms: List[Platform] = []
+        self.languages: List[Language] = []
+        self.time_zones: List[TimeZone] = []
+        self.scheduled_at: List[float] = []  # POSIX seconds, UTC
+
+    def __len__(self) -> int:
+        return len(self.image_ids)
+
+    def scheduled_time(self, i: int) -> str:
+        """
+        ISO time of row i in its own time zone, e.g. 2025-05-04T18:00:00+02:00.
+        """
+        return format_local_time(self.scheduled_at[i], self.time_zones[i])
+
+    def __getitem__(self, i: int) -> PostSchedule:
+        return PostSchedule(
+            image_id=self.image_ids[i],
+            platform=self.platforms[i],
+            target_language=self.languages[i],
+            time_zone=self.time_zones[i],
+            scheduled_time=self.scheduled_time(i),
+        )
+
+    def __iter__(self) -> Iterator[PostSchedule]:
+        return (self[i] for i in range(len(self)))
+
+    def to_models(self) -> List[PostSchedule]:
+        return list(self)
+
+
 class PostScheduler:
     """
     Manages scheduling of posts based on audience time zones.
     """
-    def schedule_posts(self, image_id: str, platforms: list[Platform], 
-                      language_time_zones: dict[Language, TimeZone], 
+    def schedule_posts(self, image_id: str, platforms: list[Platform],
+                      language_time_zones: dict[Language, TimeZone],
                       optimal_time: str) -> list[PostSchedule]:
         """
         Schedule posts for each platform and language.
         """
-        schedules = []
+        return self.schedule_bulk([image_id], platforms, language_time_zones, optimal_time).to_models()
+
+    def schedule_bulk(self, image_ids: List[str], platforms: List[Platform],
+                      language_time_zones: Dict[Language, TimeZone], optimal_time: str,
+                      spread_minutes: int = 0, slot_minutes: int = 1,
+                      now: Optional[datetime] = None) -> ScheduleBatch:
+        """
+        Schedule every image for each platform and language, tomorrow at the optimal
+        local time of each language's time zone.
+
+        The local posting time is converted to UTC once per time zone, for that
+        day's offset, and reused for every row. With spread_minutes, images are
+        spread round-robin over slots slot_minutes apart within
+        [optimal_time, optimal_time + spread_minutes), instead of all firing at once.
+        """
         optimal_hour, optimal_minute = map(int, optimal_time.split(":"))
-        
-        for platform in platforms:
-            for language, time_zone in language_time_zones.items():
-                # Get current time in the target time zone
-                tz = pytz.timezone(time_zone.value)
-                now = datetime.now(tz)
-                
-                # Schedule for the next day at the optimal time
-                scheduled_time = now.replace(
-                    hour=optimal_hour, minute=optimal_minute, second=0, microsecond=0
-                ) + timedelta(days=1)
-                
-                schedules.append(PostSchedule(
-                    image_id=image_id,
-                    platform=platform,
-                    target_language=language,
-                    time_zone=time_zone,
-                    scheduled_time=scheduled_time.isoformat()
-                ))
-        
-        return schedules
\ No newline at end of file
+        now = now or datetime.now(timezone.utc)
+        slots = max(1, spread_minutes // max(1, slot_minutes))
+        slot_seconds = slot_minutes * 60
+
+        base_times: Dict[TimeZone, float] = {}
+        for time_zone in set(language_time_zones.values()):
+            zone = get_zone(time_zone)
+            tomorrow = now.astimezone(zone).date() + timedelta(days=1)
+            base_times[time_zone] = local_time_to_utc(tomorrow, optimal_hour, optimal_minute, zone)
+
+        batch = ScheduleBatch()
+        pairs = list(language_time_zones.items())
+        rows_per_image = len(platforms) * len(pairs)
+        batch.image_ids = [image_id for image_id in image_ids for _ in range(rows_per_image)]
+        batch.platforms = [platform for _ in image_ids for platform in platforms for _ in pairs]
+        batch.languages = [language for _ in image_ids for _ in platforms for language, _ in pairs]
+        batch.time_zones = [time_zone for _ in image_ids for _ in platforms for _, time_zone in pairs]
+
+        # Slots go by image position, so each slot gets every platform of its images.
+        # Counting rows instead lines each platform up in one slot whenever the rows
+        # per image are a multiple of the slot count.
+        for row, time_zone in enumerate(batch.time_zones):
+            slot = (row // max(1, rows_per_image)) % slots
+            batch.scheduled_at.append(base_times[time_zone] + slot * slot_seconds)
+        return batch
@@ -0,0 +1,304 @@
+import os
+import sys
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from models import ImageContent, TranslatedContent, PostSchedule, Language, Platform
+
+# Older agent versions stored Tesseract codes ("eng") as the source language
+_LEGACY_LANGUAGE_CODES = {
+    "eng": Language.ENGLISH.value,
+    "spa": Language.SPANISH.value,
+    "fra": Language.FRENCH.value,
+    "deu": Language.GERMAN.value,
+    "chi_sim": Language.CHINESE.value,
+    "jpn": Language.JAPANESE.value,
+}
+
+# Terminal status for legacy schedules without a known image: kept for the record, never dispatched
+IMPORTED_WITHOUT_IMAGE = "imported"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    image_id TEXT PRIMARY KEY,
+    image_path TEXT NOT NULL,
+    source_language TEXT NOT NULL,
+    extracted_text TEXT NOT NULL,
+    timestamp TEXT
+);
+CREATE TABLE IF NOT EXISTS translations (
+    image_id TEXT NOT NULL,
+    target_language TEXT NOT NULL,
+    translated_text TEXT NOT NULL,
+    edited_image_path TEXT,
+    timestamp TEXT NOT NULL,
+    edited_image_key TEXT,
+    edited_image_url TEXT,
+    PRIMARY KEY (image_id, target_language)
+);
+CREATE INDEX IF NOT EXISTS translations_language ON translations (target_language);
+CREATE TABLE IF NOT EXISTS schedules (
+    schedule_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    image_id TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    target_language TEXT NOT NULL,
+    time_zone TEXT NOT NULL,
+    scheduled_time TEXT NOT NULL,
+    scheduled_at REAL NOT NULL,
+    post_status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS schedules_image ON schedules (image_id);
+CREATE INDEX IF NOT EXISTS schedules_platform ON schedules (platform);
+CREATE INDEX IF NOT EXISTS schedules_language ON schedules (target_language);
+CREATE INDEX IF NOT EXISTS schedules_due ON schedules (post_status, scheduled_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def to_utc_timestamp(iso_time: str) -> float:
+    """
+    POSIX timestamp of an ISO-8601 time; naive times are taken as UTC.
+    """
+    moment = datetime.fromisoformat(iso_time)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+class ContentStore:
+    """
+    SQLite persistence for processed images, translations and post schedules.
+
+    Every write is a single-row insert or upsert and reads go through indexes on
+    image_id, language, platform and (post_status, scheduled time), so costs do
+    not grow with history the way rewriting whole lists in agent storage does.
+    """
+    def __init__(self, path: str = "content_translator.sqlite3"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._add_missing_columns("translations", {"edited_image_key": "TEXT", "edited_image_url": "TEXT"})
+        self._db.commit()
+
+    def _add_missing_columns(self, table: str, columns: Dict[str, str]):
+        # Databases created by earlier versions lack columns added since
+        existing = {row["name"] for row in self._db.execute(f"PRAGMA table_info({table})")}
+        for name, column_type in columns.items():
+            if name not in existing:
+                self._db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+    @classmethod
+    def from_env(cls) -> "ContentStore":
+        return cls(os.getenv("CONTENT_DB_PATH", "content_translator.sqlite3"))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # Images
+
+    def put_image(self, image_content: ImageContent):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO images (image_id, image_path, source_language, extracted_text, timestamp)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (image_content.image_id, image_content.image_path, image_content.source_language.value,
+                 image_content.extracted_text, image_content.timestamp)
+            )
+            self._db.commit()
+
+    def get_image(self, image_id: str) -> Optional[ImageContent]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM images WHERE image_id = ?", (image_id,)).fetchone()
+        return ImageContent(**dict(row)) if row else None
+
+    # Translations
+
+    def put_translation(self, translated_content: TranslatedContent):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO translations"
+                " (image_id, target_language, translated_text, edited_image_path, timestamp,"
+                " edited_image_key, edited_image_url) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (translated_content.image_id, translated_content.target_language.value,
+                 translated_content.translated_text, translated_content.edited_image_path,
+                 translated_content.timestamp, translated_content.edited_image_key,
+                 translated_content.edited_image_url)
+            )
+            self._db.commit()
+
+    def get_translations(self, image_id: str,
+                         target_language: Optional[Language] = None) -> List[TranslatedContent]:
+        query, params = "SELECT * FROM translations WHERE image_id = ?", [image_id]
+        if target_language is not None:
+            query += " AND target_language = ?"
+            params.append(target_language.value)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [TranslatedContent(**dict(row)) for row in rows]
+
+    # Schedules
+
+    def add_schedules(self, schedules: Iterable[PostSchedule]) -> List[int]:
+        """
+        Insert the schedules and return their new schedule_ids.
+        """
+        ids = []
+        with self._lock:
+            for schedule in schedules:
+                cursor = self._db.execute(
+                    "INSERT INTO schedules (image_id, platform, target_language, time_zone,"
+                    " scheduled_time, scheduled_at, post_status) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (schedule.image_id, schedule.platform.value, schedule.target_language.value,
+                     schedule.time_zone.value, schedule.scheduled_time,
+                     to_utc_timestamp(schedule.scheduled_time), schedule.post_status)
+                )
+                ids.append(cursor.lastrowid)
+            self._db.commit()
+        return ids
+
+    def add_schedule_batch(self, batch) -> List[int]:
+        """
+        Bulk-insert a scheduler.ScheduleBatch without building PostSchedule models.
+        Returns the new schedule_ids in row order.
+        """
+        rows = [
+            (batch.image_ids[i], batch.platforms[i].value, batch.languages[i].value,
+             batch.time_zones[i].value, batch.scheduled_time(i), batch.scheduled_at[i], "pending")
+            for i in range(len(batch))
+        ]
+        if not rows:
+            return []
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO schedules (image_id, platform, target_language, time_zone,"
+                " scheduled_time, scheduled_at, post_status) VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            # Holding the lock on the only connection keeps the AUTOINCREMENT ids contiguous
+            last_id = self._db.execute("SELECT last_insert_rowid()").fetchone()[0]
+            self._db.commit()
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+
+    def get_schedules_by_ids(self, schedule_ids: List[int]) -> List[PostSchedule]:
+        schedules = []
+        with self._lock:
+            for start in range(0, len(schedule_ids), 500):
+                chunk = schedule_ids[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT * FROM schedules WHERE schedule_id IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                schedules.extend(self._schedule(row) for row in rows)
+        return schedules
+
+    def get_schedules(self, image_id: Optional[str] = None, platform: Optional[Platform] = None,
+                      target_language: Optional[Language] = None,
+                      post_status: Optional[str] = None) -> List[PostSchedule]:
+        clauses, params = [], []
+        for column, value in (("image_id", image_id), ("platform", platform),
+                              ("target_language", target_language), ("post_status", post_status)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value.value if hasattr(value, "value") else value)
+        query = "SELECT * FROM schedules"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY scheduled_at", params).fetchall()
+        return [self._schedule(row) for row in rows]
+
+    def due_schedules(self, until: float, since: Optional[float] = None,
+                      post_status: str = "pending", limit: Optional[int] = None) -> List[PostSchedule]:
+        """
+        Schedules with the given status due in [since, until] (POSIX seconds), earliest first.
+        e.g. posts due in the next 10 minutes: due_schedules(time.time() + 600)
+        """
+        query = "SELECT * FROM schedules WHERE post_status = ? AND scheduled_at <= ?"
+        params: list = [post_status, until]
+        if since is not None:
+            query += " AND scheduled_at >= ?"
+            params.append(since)
+        query += " ORDER BY scheduled_at"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [self._schedule(row) for row in rows]
+
+    def update_schedule_status(self, schedule_ids: Iterable[int], post_status: str):
+        with self._lock:
+            self._db.executemany(
+                "UPDATE schedules SET post_status = ? WHERE schedule_id = ?",
+                [(post_status, schedule_id) for schedule_id in schedule_ids]
+            )
+            self._db.commit()
+
+    @staticmethod
+    def _schedule(row: sqlite3.Row) -> PostSchedule:
+        data = dict(row)
+        data.pop("scheduled_at")
+        return PostSchedule(**data)
+
+    # Migration
+
+    def import_agent_storage(self, json_path: str) -> Dict[str, int]:
+        """
+        One-time import of an agent storage file (e.g. agent1qtc80lxj7g_data.json).
+        Returns the number of rows imported per kind; a file already imported is skipped.
+        Schedules whose image_id is empty or names no stored image cannot be
+        posted, so they are stored with the terminal status IMPORTED_WITHOUT_IMAGE
+        instead of "pending" and the dispatcher never loads them.
+        """
+        marker = f"imported:{os.path.abspath(json_path)}"
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM meta WHERE key = ?", (marker,)).fetchone():
+                return {"images": 0, "translations": 0, "schedules": 0, "schedules_without_image": 0}
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        images = list((data.get("images") or {}).values())
+        for image in images:
+            language = image.get("source_language", "")
+            image["source_language"] = _LEGACY_LANGUAGE_CODES.get(language, language)
+            self.put_image(ImageContent(**image))
+        translations = list((data.get("translations") or {}).values())
+        for translation in translations:
+            self.put_translation(TranslatedContent(**translation))
+        schedules = [PostSchedule(**schedule) for schedule in data.get("schedules") or []]
+        without_image = [
+            schedule for schedule in schedules
+            if not schedule.image_id or self.get_image(schedule.image_id) is None
+        ]
+        for schedule in without_image:
+            schedule.post_status = IMPORTED_WITHOUT_IMAGE
+        self.add_schedules(schedules)
+
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?)", (marker, datetime.now().isoformat())
+            )
+            self._db.commit()
+        return {
+            "images": len(images),
+            "translations": len(translations),
+            "schedules": len(schedules),
+            "schedules_without_image": len(without_image),
+        }
+
+
+if __name__ == "__main__":
+    # python storage.py agent1qtc80lxj7g_data.json
+    store = ContentStore.from_env()
+    for path in sys.argv[1:]:
+        print(f"{path}: {store.import_agent_storage(path)}")
+    store.close()
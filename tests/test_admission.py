@@ -0,0 +1,161 @@
+import asyncio
+import pytest
+from admission import AdmissionConfig, AdmissionController, AdmissionRejectedError, RequestCancelledError, request_fingerprint
+from models import Language, Priority, ProcessImageRequest
+
+
+def make_job(order, name, delay=0.001):
+    async def run():
+        order.append(name)
+        await asyncio.sleep(delay)
+        return name
+    return run
+
+
+def run_async(coro):
+    return asyncio.run(coro)
+
+
+def test_senders_are_served_round_robin():
+    async def scenario():
+        order = []
+        controller = AdmissionController(AdmissionConfig(max_running=1, max_queued=100, max_queued_per_sender=100))
+        first = asyncio.ensure_future(controller.submit(make_job(order, "a0", 0.01), "a"))
+        await asyncio.sleep(0)
+        rest = [asyncio.ensure_future(controller.submit(make_job(order, f"a{i}"), "a")) for i in range(1, 4)]
+        rest += [asyncio.ensure_future(controller.submit(make_job(order, f"b{i}"), "b")) for i in range(2)]
+        await asyncio.gather(first, *rest)
+        return order
+
+    assert run_async(scenario()) == ["a0", "a1", "b0", "a2", "b1", "a3"]
+
+
+def test_bulk_gets_every_nth_dispatch():
+    async def scenario():
+        order = []
+        controller = AdmissionController(AdmissionConfig(max_running=1, max_queued=100, max_queued_per_sender=100,
+                                                         bulk_every=3))
+        blocker = asyncio.ensure_future(controller.submit(make_job(order, "start", 0.01), "x"))
+        await asyncio.sleep(0)
+        jobs = [asyncio.ensure_future(controller.submit(make_job(order, f"b{i}"), "z", Priority.BULK)) for i in range(2)]
+        jobs += [asyncio.ensure_future(controller.submit(make_job(order, f"i{i}"), "a")) for i in range(4)]
+        await asyncio.gather(blocker, *jobs)
+        return order
+
+    assert run_async(scenario()) == ["start", "i0", "b0", "i1", "i2", "b1", "i3"]
+
+
+def test_rejects_past_queue_depth_and_sender_share():
+    async def scenario():
+        controller = AdmissionController(AdmissionConfig(max_running=1, max_queued=4, max_queued_per_sender=2,
+                                                         bulk_queue_share=0.5))
+        order = []
+        running = asyncio.ensure_future(controller.submit(make_job(order, "run", 0.05), "a"))
+        queued = [asyncio.ensure_future(controller.submit(make_job(order, f"a{i}"), "a")) for i in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejectedError, match="Too many queued requests") as sender_full:
+            await controller.submit(make_job(order, "a3"), "a")
+        with pytest.raises(AdmissionRejectedError, match="Queue full"):
+            await controller.submit(make_job(order, "bulk"), "b", Priority.BULK)
+        assert sender_full.value.retry_after >= 1
+        # Another sender still has room in the interactive part of the queue
+        other = await controller.submit(make_job(order, "b0"), "b")
+        await asyncio.gather(running, *queued)
+        return other
+
+    assert run_async(scenario()) == "b0"
+
+
+
+def test_waiting_submit_gets_backpressure_instead_of_rejection():
+    async def scenario():
+        controller = AdmissionController(AdmissionConfig(max_running=1, max_queued=2, max_queued_per_sender=2,
+                                                         bulk_queue_share=1.0))
+        order = []
+        jobs = [asyncio.ensure_future(controller.submit(make_job(order, f"b{i}"), "a", Priority.BULK, wait=True))
+                for i in range(6)]
+        await asyncio.sleep(0)
+        assert controller.queued == 2
+        results = await asyncio.gather(*jobs)
+        return order, results, controller.queued, controller.running
+
+    order, results, queued, running = run_async(scenario())
+    assert results == [f"b{i}" for i in range(6)]
+    assert order == results
+    assert (queued, running) == (0, 0)
+
+def test_identical_requests_share_one_job():
+    request = ProcessImageRequest(image_path="x.png", source_language=Language.ENGLISH,
+                                  target_languages=[Language.SPANISH], request_id="1")
+    duplicate = request.copy(update={"request_id": "2", "priority": Priority.BULK})
+    other = request.copy(update={"target_languages": [Language.FRENCH]})
+    assert request_fingerprint(request) == request_fingerprint(duplicate)
+    assert request_fingerprint(request) != request_fingerprint(other)
+
+    async def scenario():
+        order = []
+        controller = AdmissionController(AdmissionConfig(max_running=1))
+        key = request_fingerprint(request)
+        results = await asyncio.gather(
+            controller.submit(make_job(order, "first"), "a", key=key),
+            controller.submit(make_job(order, "second"), "b", key=key),
+        )
+        again = await controller.submit(make_job(order, "third"), "a", key=key)  # Finished jobs are not reused
+        return order, results, again
+
+    order, results, again = run_async(scenario())
+    assert order == ["first", "third"]
+    assert results == ["first", "first"]
+    assert again == "third"
+
+
+def test_cancel_queued_and_running_requests():
+    async def scenario():
+        order = []
+        controller = AdmissionController(AdmissionConfig(max_running=1))
+        running = asyncio.ensure_future(controller.submit(make_job(order, "long", 10), "a", waiter_id=("a", "1")))
+        queued = asyncio.ensure_future(controller.submit(make_job(order, "queued"), "a", waiter_id=("a", "2")))
+        after = asyncio.ensure_future(controller.submit(make_job(order, "after"), "b"))
+        await asyncio.sleep(0.01)
+        assert controller.cancel(("a", "2"))
+        assert controller.cancel(("a", "1"))
+        assert not controller.cancel(("a", "1"))
+        results = await asyncio.gather(running, queued, after, return_exceptions=True)
+        return order, results, controller.stats()
+
+    order, results, stats = run_async(scenario())
+    assert order == ["long", "after"]
+    assert isinstance(results[0], RequestCancelledError) and isinstance(results[1], RequestCancelledError)
+    assert results[2] == "after"
+    assert stats["running"] == 0 and stats["queued"] == 0
+
+
+def test_cancel_before_the_job_starts_frees_its_slot():
+    async def scenario():
+        order = []
+        controller = AdmissionController(AdmissionConfig(max_running=1))
+        job = asyncio.ensure_future(controller.submit(make_job(order, "x"), "a", waiter_id=("a", "1")))
+        await asyncio.sleep(0)  # Dispatched, but the job's task has not run yet
+        assert controller.cancel(("a", "1"))
+        with pytest.raises(RequestCancelledError):
+            await job
+        await asyncio.sleep(0)
+        return order, controller.running, await controller.submit(make_job(order, "next"), "a")
+
+    order, running, result = run_async(scenario())
+    assert order == ["next"] and running == 0 and result == "next"
+
+
+def test_shared_job_keeps_running_while_a_waiter_remains():
+    async def scenario():
+        order = []
+        controller = AdmissionController(AdmissionConfig(max_running=1))
+        first = asyncio.ensure_future(controller.submit(make_job(order, "job", 0.02), "a", key="k", waiter_id=("a", "1")))
+        second = asyncio.ensure_future(controller.submit(make_job(order, "dup", 0.02), "b", key="k", waiter_id=("b", "1")))
+        await asyncio.sleep(0.005)
+        controller.cancel(("a", "1"))
+        return await asyncio.gather(first, second, return_exceptions=True)
+
+    first, second = run_async(scenario())
+    assert isinstance(first, RequestCancelledError)
+    assert second == "job"
@@ -0,0 +1,141 @@
+import io
+import hashlib
+import pytest
+from artifact_store import LocalArtifactStore, S3ArtifactStore, content_key, read_image_source
+
+
+def test_local_store_evicts_least_recently_used_past_budget(tmp_path):
+    store = LocalArtifactStore(str(tmp_path), max_bytes=250)
+    first, second = store.put_bytes(b"a" * 100, ".png"), store.put_bytes(b"b" * 100, ".png")
+    store.get_bytes(first)  # Reading makes it recent
+    third = store.put_bytes(b"c" * 100, ".png")
+    assert store.exists(first) and store.exists(third)
+    assert not store.exists(second)
+    assert store.total_bytes == 200
+
+
+def test_local_store_index_survives_restart(tmp_path):
+    store = LocalArtifactStore(str(tmp_path), max_bytes=1000)
+    key = store.put_bytes(b"x" * 300)
+    reopened = LocalArtifactStore(str(tmp_path), max_bytes=1000)
+    assert reopened.total_bytes == 300
+    assert reopened.get_bytes(key) == b"x" * 300
+
+
+@pytest.mark.parametrize("key", ["../outside.png", "ab/../../outside.png", "/etc/passwd", "ab//c.png", "C:/x.png"])
+def test_local_store_rejects_keys_outside_its_directory(tmp_path, key):
+    store = LocalArtifactStore(str(tmp_path / "artifacts"))
+    with pytest.raises(ValueError, match="Invalid artifact key"):
+        store.local_path(key)
+    with pytest.raises(ValueError):
+        read_image_source(store, image_url=f"artifact://{key}")
+
+
+def test_local_store_reads_ranges(tmp_path):
+    store = LocalArtifactStore(str(tmp_path))
+    key = store.put_bytes(b"0123456789", ".png")
+    assert store.size(key) == 10
+    assert store.read_range(key, 3, 4) == b"3456"
+    assert store.read_range(key, 8, 100) == b"89"
+
+
+def test_image_url_accepts_store_urls_and_http_only(tmp_path):
+    store = LocalArtifactStore(str(tmp_path))
+    key = store.put_bytes(b"image")
+    assert read_image_source(store, image_url=store.url(key)) == b"image"
+    (tmp_path / "secret.txt").write_bytes(b"secret")
+    with pytest.raises(ValueError, match="Unsupported image_url"):
+        read_image_source(store, image_url=(tmp_path / "secret.txt").as_uri())
+
+
+class FakeS3Client:
+    """
+    In-memory stand-in for the boto3 S3 calls S3ArtifactStore makes.
+    """
+    def __init__(self, fail_on_part=None):
+        self.objects = {}
+        self.uploads = {}
+        self.aborted = []
+        self.part_sizes = []
+        self.fail_on_part = fail_on_part
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise KeyError(Key)
+        return {"ContentLength": len(self.objects[(Bucket, Key)])}
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[(Bucket, Key)] = bytes(Body)
+
+    def create_multipart_upload(self, Bucket, Key):
+        upload_id = f"upload-{len(self.uploads)}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        if PartNumber == self.fail_on_part:
+            raise ConnectionError("connection reset")
+        self.uploads[UploadId][PartNumber] = bytes(Body)
+        self.part_sizes.append(len(Body))
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        assert numbers == sorted(parts)
+        self.objects[(Bucket, Key)] = b"".join(parts[number] for number in numbers)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId, None)
+        self.aborted.append(UploadId)
+
+    def get_object(self, Bucket, Key, Range):
+        start, end = map(int, Range[len("bytes="):].split("-"))
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)][start:end + 1])}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+
+def test_s3_store_uploads_large_objects_in_parts():
+    client = FakeS3Client()
+    store = S3ArtifactStore("bucket", prefix="renders", chunk_size=1024, client=client)
+    data = bytes(range(256)) * 40  # 10 KiB -> 10 parts
+
+    key = store.put_stream(io.BytesIO(data), ".png")
+
+    assert key == content_key(hashlib.sha256(data).hexdigest(), ".png")
+    assert client.part_sizes == [1024] * 10
+    assert ("bucket", f"renders/{key}") in client.objects
+    assert store.url(key) == f"s3://bucket/renders/{key}"
+    assert store.get_bytes(key) == data  # Ranged GETs, one per chunk
+    # Content-addressed: storing the same bytes again uploads nothing
+    assert store.put_bytes(data, ".png") == key
+    assert len(client.part_sizes) == 10
+
+
+def test_s3_store_uses_a_single_put_for_small_objects():
+    client = FakeS3Client()
+    store = S3ArtifactStore("bucket", chunk_size=1024, client=client)
+    key = store.put_bytes(b"small")
+    assert client.part_sizes == []
+    assert store.get_bytes(key) == b"small"
+
+
+def test_s3_store_aborts_a_failed_multipart_upload():
+    client = FakeS3Client(fail_on_part=3)
+    store = S3ArtifactStore("bucket", chunk_size=1024, client=client)
+    with pytest.raises(ConnectionError):
+        store.put_bytes(b"x" * 5000)
+    assert client.aborted == ["upload-0"]
+    assert client.objects == {}
+
+
+def test_s3_urls_returned_by_the_store_can_be_read_back():
+    client = FakeS3Client()
+    store = S3ArtifactStore("bucket", prefix="renders", chunk_size=1024, client=client)
+    key = store.put_bytes(b"rendered", ".png")
+    assert read_image_source(store, image_url=store.url(key)) == b"rendered"
+    assert store.read_range(key, 2, 3) == b"nde"
+    with pytest.raises(ValueError, match="Unsupported image_url"):
+        read_image_source(store, image_url=f"s3://other-bucket/{key}")
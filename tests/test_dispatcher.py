@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from models import Language, Platform, PostSchedule, TimeZone
+from storage import ContentStore
+from dispatcher import PostDispatcher, FakePlatformAdapter, PlatformAdapter, POSTED, FAILED, MISSED, SKIPPED
+
+NOW = 1_746_374_400.0  # 2025-05-04T16:00:00Z
+
+
+@pytest.fixture
+def store():
+    store = ContentStore(":memory:")
+    yield store
+    store.close()
+
+
+def add_schedule(store, dispatcher, scheduled_time, platform=Platform.TWITTER):
+    schedule = PostSchedule(
+        image_id="img", platform=platform, target_language=Language.SPANISH,
+        time_zone=TimeZone.CET, scheduled_time=scheduled_time,
+    )
+    schedule.schedule_id = store.add_schedules([schedule])[0]
+    dispatcher.add([schedule])
+    return schedule.schedule_id
+
+
+def status_of(store, schedule_id):
+    return store.get_schedules_by_ids([schedule_id])[0].post_status
+
+
+class FailingAdapter(PlatformAdapter):
+    async def publish(self, schedules):
+        raise RuntimeError("platform down")
+
+
+def test_publishes_due_posts_and_keeps_future_ones(store):
+    adapter = FakePlatformAdapter()
+    dispatcher = PostDispatcher(store, adapters={platform: adapter for platform in Platform})
+    due = add_schedule(store, dispatcher, "2025-05-04T17:00:00+02:00")  # 15:00Z
+    later = add_schedule(store, dispatcher, "2025-05-04T20:00:00+02:00")  # 18:00Z
+
+    counts = asyncio.run(dispatcher.dispatch_due(NOW))
+
+    assert counts == {POSTED: 1}
+    assert [schedule.schedule_id for batch in adapter.batches for schedule in batch] == [due]
+    assert status_of(store, due) == POSTED
+    assert status_of(store, later) == "pending"
+    assert len(dispatcher) == 1
+
+
+def test_bulk_rows_added_by_id_are_read_from_the_store(store):
+    adapter = FakePlatformAdapter()
+    dispatcher = PostDispatcher(store, adapters={platform: adapter for platform in Platform})
+    schedule = PostSchedule(image_id="img", platform=Platform.FACEBOOK, target_language=Language.FRENCH,
+                            time_zone=TimeZone.CET, scheduled_time="2025-05-04T17:00:00+02:00")
+    schedule_id = store.add_schedules([schedule])[0]
+    dispatcher.add_ids([NOW - 3600], [schedule_id])
+
+    assert asyncio.run(dispatcher.dispatch_due(NOW)) == {POSTED: 1}
+    assert adapter.batches[0][0].platform == Platform.FACEBOOK
+
+
+def test_overdue_posts_are_missed_and_adapter_errors_fail(store):
+    dispatcher = PostDispatcher(store, adapters={Platform.TWITTER: FailingAdapter()}, max_lateness=3600)
+    stale = add_schedule(store, dispatcher, "2025-05-03T17:00:00+02:00")
+    failing = add_schedule(store, dispatcher, "2025-05-04T17:30:00+02:00")
+
+    counts = asyncio.run(dispatcher.dispatch_due(NOW))
+
+    assert counts == {MISSED: 1, FAILED: 1}
+    assert status_of(store, stale) == MISSED
+    assert status_of(store, failing) == FAILED
+
+
+def test_default_adapter_skips_instead_of_posting(store):
+    dispatcher = PostDispatcher(store)
+    schedule_id = add_schedule(store, dispatcher, "2025-05-04T17:00:00+02:00")
+
+    assert asyncio.run(dispatcher.dispatch_due(NOW)) == {SKIPPED: 1}
+    assert status_of(store, schedule_id) == SKIPPED
+
+
+def test_failed_batch_is_requeued_and_retried(store, monkeypatch):
+    adapter = FakePlatformAdapter()
+    dispatcher = PostDispatcher(store, adapters={platform: adapter for platform in Platform}, retry_delay=30)
+    schedule_id = add_schedule(store, dispatcher, "2025-05-04T17:00:00+02:00")
+    update = store.update_schedule_status
+
+    def broken_update(schedule_ids, post_status):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(store, "update_schedule_status", broken_update)
+    with pytest.raises(RuntimeError):
+        asyncio.run(dispatcher.dispatch_due(NOW))
+    assert status_of(store, schedule_id) == "pending"
+    assert dispatcher.next_due() == NOW + 30
+
+    monkeypatch.setattr(store, "update_schedule_status", update)
+    assert asyncio.run(dispatcher.dispatch_due(NOW + 10)) == {}  # Not retried before the delay
+    assert asyncio.run(dispatcher.dispatch_due(NOW + 30)) == {POSTED: 1}
+    assert status_of(store, schedule_id) == POSTED
+    assert len(dispatcher) == 0
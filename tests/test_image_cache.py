@@ -0,0 +1,52 @@
+import os
+from PIL import Image
+from image_cache import ImageResultCache, params_key
+from Image_processor import ImageProcessor
+from ocr_preprocess import OCRSettings
+from ocr import OCRAnalysis
+from models import Language
+
+
+def test_output_round_trip_leaves_no_temporary_files(tmp_path):
+    cache = ImageResultCache(str(tmp_path))
+    cache.put_output("abc", Language.SPANISH, "p1", "ab/abc.png", "hola")
+    assert cache.get_output("abc", Language.SPANISH, "p1") == ("ab/abc.png", "hola")
+    assert cache.get_output("abc", Language.FRENCH, "p1") is None
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_file_removed_after_indexing_is_a_miss(tmp_path):
+    cache = ImageResultCache(str(tmp_path))
+    cache.put_background("abc", Language.ENGLISH, "s1", Image.new("RGB", (4, 4), "white"))
+    assert cache.get_background("abc", Language.ENGLISH, "s1").size == (4, 4)
+    # As if another thread evicted it between the index lookup and the read
+    os.remove(cache._path("abc", Language.ENGLISH.value, "s1", "background.png"))
+    assert cache.get_background("abc", Language.ENGLISH, "s1") is None
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
+
+
+def test_evicts_least_recently_used_past_budget(tmp_path):
+    cache = ImageResultCache(str(tmp_path), max_bytes=150)
+    cache.put_output("a", Language.SPANISH, "p", "a.png", "x" * 20)
+    cache.put_output("b", Language.SPANISH, "p", "b.png", "x" * 20)
+    cache.get_output("a", Language.SPANISH, "p")  # Reading makes it recent
+    cache.put_output("c", Language.SPANISH, "p", "c.png", "x" * 20)
+    assert cache.get_output("b", Language.SPANISH, "p") is None
+    assert cache.get_output("a", Language.SPANISH, "p") is not None
+    assert cache.get_output("c", Language.SPANISH, "p") is not None
+
+
+def test_entries_are_keyed_by_the_settings_that_produced_them(tmp_path):
+    cache = ImageResultCache(str(tmp_path))
+    checked = ImageProcessor(load_inpainting_model=False, ocr_settings=OCRSettings(text_check=True))
+    unchecked = ImageProcessor(load_inpainting_model=False, ocr_settings=OCRSettings(text_check=False))
+    old, new = checked.cache_settings(), unchecked.cache_settings()
+    assert all(old[stage] != new[stage] for stage in ("ocr", "inpaint", "render"))
+
+    cache.put_analysis("abc", Language.ENGLISH, old["ocr"], OCRAnalysis(width=4, height=4, language="eng"))
+    assert cache.get_analysis("abc", Language.ENGLISH, old["ocr"]) is not None
+    assert cache.get_analysis("abc", Language.ENGLISH, new["ocr"]) is None
+    font = {"family": "arial.ttf", "size": "24"}
+    assert params_key(Language.ENGLISH, font, old["render"]) != params_key(Language.ENGLISH, font, new["render"])
+    assert checked.cache_settings() == old
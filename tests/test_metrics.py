@@ -0,0 +1,28 @@
+import os
+import threading
+from metrics import RequestTrace
+
+
+def test_concurrent_profiled_stages_profile_one_at_a_time(tmp_path):
+    trace = RequestTrace(profile=True)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_stage():
+        started.set()
+        release.wait(5)
+        return "slow"
+
+    results = {}
+    worker = threading.Thread(target=lambda: results.setdefault("slow", trace.run_profiled(slow_stage)))
+    worker.start()
+    started.wait(5)
+    # Runs while the first stage holds the profiler, so it must not try to enable another
+    results["fast"] = trace.run_profiled(lambda x: x * 2, 21)
+    release.set()
+    worker.join(5)
+
+    assert results == {"slow": "slow", "fast": 42}
+    assert len(trace.profiles) == 1
+    assert trace.unprofiled_stages == 1
+    path = trace.dump_profile(os.path.join(tmp_path, "trace.pstats"))
+    assert path and os.path.getsize(path) > 0
@@ -0,0 +1,28 @@
+import os
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+from ocr_preprocess import has_text_candidates
+
+FONT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "arial.ttf")
+
+
+def caption_frame(width, height, text_size, text="Summer sale on all items today"):
+    image = Image.new("RGB", (width, height), (200, 180, 150))
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.truetype(FONT_PATH, text_size)
+    draw.text((width // 10, height - height // 8), text, font=font, fill=(255, 255, 255))
+    return image
+
+
+@pytest.mark.parametrize("width,height,text_size", [
+    (1080, 1350, 14),
+    (2160, 2700, 30),
+    (3000, 3750, 40),
+    (4000, 5000, 40),
+])
+def test_small_captions_on_large_frames_are_candidates(width, height, text_size):
+    assert has_text_candidates(caption_frame(width, height, text_size))
+
+
+def test_blank_frame_has_no_candidates():
+    assert not has_text_candidates(Image.new("RGB", (4000, 5000), (200, 180, 150)))
@@ -0,0 +1,67 @@
+from collections import Counter
+from datetime import datetime, timezone
+from models import Language, Platform, TimeZone
+from scheduler import PostScheduler
+
+PLATFORMS = [Platform.INSTAGRAM, Platform.TWITTER, Platform.FACEBOOK]
+
+
+def test_spread_mixes_platforms_across_slots():
+    now = datetime(2025, 5, 3, 12, 0, tzinfo=timezone.utc)
+    batch = PostScheduler().schedule_bulk(
+        [f"img{i}" for i in range(1000)], PLATFORMS, {Language.SPANISH: TimeZone.CET}, "18:00",
+        spread_minutes=30, slot_minutes=10, now=now,
+    )
+    assert len(batch) == 3000
+    per_platform = {platform: Counter() for platform in PLATFORMS}
+    for platform, scheduled_at in zip(batch.platforms, batch.scheduled_at):
+        per_platform[platform][scheduled_at] += 1
+    for counts in per_platform.values():
+        # Every platform uses all three slots, roughly a third of its posts each
+        assert len(counts) == 3
+        assert max(counts.values()) - min(counts.values()) <= 1
+    assert batch.scheduled_time(0) == "2025-05-04T18:00:00+02:00"
+
+
+def test_rows_of_one_image_share_a_slot():
+    now = datetime(2025, 5, 3, 12, 0, tzinfo=timezone.utc)
+    batch = PostScheduler().schedule_bulk(
+        ["a", "b"], PLATFORMS, {Language.SPANISH: TimeZone.CET}, "18:00",
+        spread_minutes=20, slot_minutes=10, now=now,
+    )
+    assert set(batch.scheduled_at[:3]) == {batch.scheduled_at[0]}
+    assert batch.scheduled_at[3] - batch.scheduled_at[0] == 600
+
+
+def test_no_spread_posts_at_optimal_time():
+    now = datetime(2025, 5, 3, 12, 0, tzinfo=timezone.utc)
+    batch = PostScheduler().schedule_bulk(
+        ["a", "b", "c"], PLATFORMS, {Language.SPANISH: TimeZone.CET}, "18:00", now=now,
+    )
+    assert set(batch.scheduled_at) == {batch.scheduled_at[0]}
+
+
+def test_offset_of_the_posting_day_is_used_across_dst():
+    scheduler = PostScheduler()
+    zones = {Language.SPANISH: TimeZone.CET, Language.ENGLISH: TimeZone.EST}
+    # Posting on 2025-03-09: New York has switched to EDT that morning, Paris is still on CET
+    batch = scheduler.schedule_bulk(["a"], [Platform.TWITTER], zones, "18:00",
+                                    now=datetime(2025, 3, 8, 12, 0, tzinfo=timezone.utc))
+    times = {language: scheduled_at for language, scheduled_at in zip(batch.languages, batch.scheduled_at)}
+    assert times[Language.ENGLISH] == datetime(2025, 3, 9, 22, 0, tzinfo=timezone.utc).timestamp()
+    assert times[Language.SPANISH] == datetime(2025, 3, 9, 17, 0, tzinfo=timezone.utc).timestamp()
+    assert batch.scheduled_time(1) == "2025-03-09T18:00:00-04:00"
+
+    # A week before, both zones are on standard time
+    batch = scheduler.schedule_bulk(["a"], [Platform.TWITTER], zones, "18:00",
+                                    now=datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc))
+    times = {language: scheduled_at for language, scheduled_at in zip(batch.languages, batch.scheduled_at)}
+    assert times[Language.ENGLISH] == datetime(2025, 3, 2, 23, 0, tzinfo=timezone.utc).timestamp()
+    assert times[Language.SPANISH] == datetime(2025, 3, 2, 17, 0, tzinfo=timezone.utc).timestamp()
+
+
+def test_time_skipped_by_dst_resolves_after_the_jump():
+    # 02:30 does not exist in Paris on 2025-03-30; it resolves to 03:30 CEST (01:30 UTC)
+    batch = PostScheduler().schedule_bulk(["a"], [Platform.TWITTER], {Language.FRENCH: TimeZone.CET}, "02:30",
+                                          now=datetime(2025, 3, 29, 12, 0, tzinfo=timezone.utc))
+    assert batch.scheduled_at[0] == datetime(2025, 3, 30, 1, 30, tzinfo=timezone.utc).timestamp()
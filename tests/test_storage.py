@@ -0,0 +1,25 @@
+import json
+from models import Language
+from storage import ContentStore, IMPORTED_WITHOUT_IMAGE
+
+
+def test_legacy_schedules_without_a_known_image_are_not_left_pending(tmp_path):
+    legacy = tmp_path / "agent_data.json"
+    schedule = {"platform": "instagram", "target_language": "es", "time_zone": "Europe/Paris",
+                "scheduled_time": "2025-05-04T18:00:00+02:00", "post_status": "pending"}
+    legacy.write_text(json.dumps({
+        "images": {"img-1": {"image_id": "img-1", "image_path": "a.png", "source_language": "eng",
+                             "extracted_text": "Hello", "timestamp": "2025-05-01T10:00:00"}},
+        "schedules": [dict(schedule, image_id="img-1"), dict(schedule, image_id=""),
+                      dict(schedule, image_id="missing")],
+    }))
+    store = ContentStore(":memory:")
+
+    counts = store.import_agent_storage(str(legacy))
+
+    assert counts["schedules"] == 3 and counts["schedules_without_image"] == 2
+    assert [s.image_id for s in store.get_schedules(post_status="pending")] == ["img-1"]
+    assert len(store.get_schedules(post_status=IMPORTED_WITHOUT_IMAGE)) == 2
+    assert store.get_image("img-1").source_language == Language.ENGLISH
+    assert store.import_agent_storage(str(legacy))["schedules"] == 0
+    store.close()
@@ -0,0 +1,62 @@
+import time
+import sqlite3
+import asyncio
+from models import Language
+from translation import BatchTranslator, FakeTranslationBackend
+from translation_memory import CachedTranslationBackend, TranslationMemory
+
+
+def test_batch_translator_makes_one_call_per_language():
+    backend = FakeTranslationBackend()
+    translator = BatchTranslator(backend, max_concurrency=2)
+    result = asyncio.run(translator.translate_batch(
+        ["Hello", "", "World"], Language.ENGLISH, [Language.SPANISH, Language.FRENCH, Language.GERMAN]
+    ))
+    assert result[Language.SPANISH] == ["[es] Hello", "", "[es] World"]
+    assert result[Language.GERMAN] == ["[de] Hello", "", "[de] World"]
+    assert backend.calls == 3
+
+
+def test_translation_memory_sends_only_missing_segments():
+    backend = FakeTranslationBackend(translations={"Hello": "Hola"})
+    memory = TranslationMemory(":memory:")
+    cached = CachedTranslationBackend(backend, memory)
+
+    assert cached.translate_segments(["Hello", "World"], Language.ENGLISH, Language.SPANISH) == ["Hola", "[es] World"]
+    assert backend.calls == 1
+    # Normalized text hits the memory; only the new segment reaches the backend
+    assert cached.translate_segments(["  Hello ", "New"], Language.ENGLISH, Language.SPANISH) == ["Hola", "[es] New"]
+    assert backend.calls == 2
+    assert cached.translate_segments(["World"], Language.ENGLISH, Language.SPANISH) == ["[es] World"]
+    assert backend.calls == 2
+    memory.close()
+
+
+def test_translation_memory_expires_entries(monkeypatch):
+    memory = TranslationMemory(":memory:", ttl_seconds=60)
+    memory.put("Hello", Language.ENGLISH, Language.SPANISH, "Hola")
+    assert memory.get("Hello", Language.ENGLISH, Language.SPANISH) == "Hola"
+    later = time.time() + 120
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert memory.get("Hello", Language.ENGLISH, Language.SPANISH) is None
+    memory.close()
+
+
+def test_disk_hits_defer_their_last_used_update(tmp_path, monkeypatch):
+    path = str(tmp_path / "memory.sqlite3")
+    memory = TranslationMemory(path)
+    memory.put("Hello", Language.ENGLISH, Language.SPANISH, "Hola")
+    memory.close()
+
+    def last_used():
+        with sqlite3.connect(path) as db:
+            return db.execute("SELECT last_used FROM translation_memory").fetchone()[0]
+
+    written = last_used()
+    reopened = TranslationMemory(path)
+    later = time.time() + 120
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert reopened.get("Hello", Language.ENGLISH, Language.SPANISH) == "Hola"
+    assert last_used() == written  # The hit did not write
+    reopened.close()
+    assert last_used() == later
@@ -0,0 +1,21 @@
+import time
+import asyncio
+from workers import WorkerConfig, WorkerPool
+
+
+def test_jobs_past_queue_depth_wait_for_a_slot():
+    async def scenario():
+        pool = WorkerPool(WorkerConfig(threads=2, inpaint_workers=0, queue_depth=1, timeouts={}))
+        try:
+            jobs = [pool.run_thread("render", lambda i=i: time.sleep(0.01) or i) for i in range(4)]
+            pending = asyncio.gather(*jobs)
+            await asyncio.sleep(0)
+            waiting = pool.pending
+            return waiting, await pending, pool.pending
+        finally:
+            pool.shutdown()
+
+    waiting, results, pending_after = asyncio.run(scenario())
+    assert waiting == 4
+    assert results == [0, 1, 2, 3]
+    assert pending_after == 0
@@ -0,0 +1,275 @@
+import os
+import glob
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+from PIL import ImageDraw, ImageFont
+
+Box = Tuple[int, int, int, int]  # (left, top, right, bottom)
+
+# Fonts shipped in the repository root, loaded at startup
+BUNDLED_FONT_PATTERNS = ("arial*.ttf", "ariblk.ttf")
+
+
+@lru_cache(maxsize=None)
+def _bidi_modules():
+    """
+    arabic_reshaper and python-bidi are optional; without them RTL text is drawn as given.
+    """
+    try:
+        import arabic_reshaper
+        from bidi.algorithm import get_display
+        return arabic_reshaper, get_display
+    except ImportError:
+        return None
+
+
+def is_rtl(text: str) -> bool:
+    return any(unicodedata.bidirectional(char) in ("R", "AL") for char in text)
+
+
+@lru_cache(maxsize=8192)
+def shape_text(text: str) -> str:
+    """
+    Visual-order, joined form of a run of text. Arabic letters are reshaped into
+    their contextual forms and RTL runs reordered; other scripts pass through.
+    """
+    if not is_rtl(text):
+        return text
+    modules = _bidi_modules()
+    if modules is None:
+        return text
+    arabic_reshaper, get_display = modules
+    return get_display(arabic_reshaper.reshape(text))
+
+
+def _break_tokens(text: str) -> List[Tuple[str, str]]:
+    """
+    Wrap points as (separator, token): words for space-separated scripts, single
+    characters for CJK runs, which join without a space.
+    """
+    tokens = []
+    for word in text.split():
+        separator, run = " ", ""
+        for char in word:
+            if unicodedata.east_asian_width(char) in ("W", "F"):
+                if run:
+                    tokens.append((separator, run))
+                    separator, run = "", ""
+                tokens.append((separator, char))
+                separator = ""
+            else:
+                run += char
+        if run:
+            tokens.append((separator, run))
+    return tokens
+
+
+@dataclass
+class TextLayout:
+    """
+    Text wrapped to a box at the largest font size that fits.
+    """
+    lines: List[str]  # Already shaped, in drawing order
+    size: int
+    line_height: int
+    width: int
+    height: int
+    rtl: bool = False
+
+
+class FontCache:
+    """
+    LRU of loaded FreeTypeFont objects per (family, size).
+
+    Font files are read into memory once per family, so a new size is built
+    from the cached bytes instead of reopening the file. The bundled Arial
+    variants are loaded when the cache is created.
+    """
+    def __init__(self, font_dir: str = ".", max_fonts: int = 128,
+                 family_paths: Optional[Dict[str, str]] = None):
+        self.font_dir = font_dir
+        self.max_fonts = max_fonts
+        self.family_paths = dict(family_paths or {})
+        self._data: Dict[str, bytes] = {}
+        self._fonts: "OrderedDict[Tuple[str, int], ImageFont.FreeTypeFont]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def preload(self, sizes: Tuple[int, ...] = (24,)):
+        for pattern in BUNDLED_FONT_PATTERNS:
+            for path in sorted(glob.glob(os.path.join(self.font_dir, pattern))):
+                for size in sizes:
+                    self.get(os.path.basename(path), size)
+
+    def resolve(self, family: str) -> str:
+        """
+        Path of a family given as a file name ("arial.ttf"), a bare name ("Arial") or a path.
+        """
+        if family in self.family_paths:
+            return self.family_paths[family]
+        candidates = [family]
+        if not os.path.splitext(family)[1]:
+            candidates += [f"{family.lower()}.ttf", f"{family.lower()}.otf"]
+        for candidate in candidates:
+            for path in (candidate, os.path.join(self.font_dir, candidate)):
+                if os.path.isfile(path):
+                    self.family_paths[family] = path
+                    return path
+        raise Exception(f"Font not found: {family}")
+
+    def get(self, family: str, size: int) -> ImageFont.FreeTypeFont:
+        key = (family, size)
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is not None:
+                self._fonts.move_to_end(key)
+                return font
+        path = self.resolve(family)
+        data = self._data.get(path)
+        if data is None:
+            with open(path, "rb") as f:
+                data = self._data[path] = f.read()
+        font = ImageFont.truetype(BytesIO(data), size)
+        with self._lock:
+            self._fonts[key] = font
+            while len(self._fonts) > self.max_fonts:
+                self._fonts.popitem(last=False)
+        return font
+
+    def __len__(self) -> int:
+        return len(self._fonts)
+
+
+class TextLayoutEngine:
+    """
+    Fits translated text into the boxes of the original text blocks.
+
+    Each block's translation is wrapped to the block's width and shrunk until
+    it fits the block's height, then drawn at the block's position. Fonts come
+    from a FontCache, and token widths and finished layouts are memoized, so
+    rendering the same image in several languages, or the same caption on many
+    images, reuses them instead of measuring again.
+    """
+    def __init__(self, fonts: Optional[FontCache] = None, min_size: int = 10,
+                 line_spacing: float = 1.2, max_layouts: int = 4096,
+                 language_families: Optional[Dict[str, str]] = None):
+        self.fonts = fonts or FontCache()
+        self.min_size = min_size
+        self.line_spacing = line_spacing
+        self.max_layouts = max_layouts
+        self.language_families = dict(language_families or {})
+        self._widths: Dict[Tuple[str, int, str], float] = {}
+        self._layouts: "OrderedDict[tuple, TextLayout]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "TextLayoutEngine":
+        # e.g. LANGUAGE_FONTS=zh-cn=NotoSansSC-Regular.otf,ja=NotoSansJP-Regular.otf
+        language_families = {}
+        for pair in filter(None, os.getenv("LANGUAGE_FONTS", "").split(",")):
+            language, _, family = pair.partition("=")
+            language_families[language.strip()] = family.strip()
+        fonts = FontCache(
+            font_dir=os.getenv("FONT_DIR", "."),
+            max_fonts=int(os.getenv("FONT_CACHE_SIZE", "128")),
+        )
+        fonts.preload()
+        return cls(fonts, min_size=int(os.getenv("MIN_FONT_SIZE", "10")), language_families=language_families)
+
+    def family_for(self, family: str, language: Optional[str] = None) -> str:
+        """
+        Font for a target language, for scripts the requested family has no glyphs for.
+        """
+        return self.language_families.get(language, family) if language else family
+
+    def text_width(self, family: str, size: int, text: str) -> float:
+        key = (family, size, text)
+        width = self._widths.get(key)
+        if width is None:
+            width = self.fonts.get(family, size).getlength(text)
+            if len(self._widths) > 100_000:
+                self._widths.clear()
+            self._widths[key] = width
+        return width
+
+    def wrap(self, text: str, family: str, size: int, max_width: int) -> List[str]:
+        """
+        Greedy word wrap (character wrap for CJK) of logical-order text.
+        """
+        lines = []
+        for paragraph in text.split("\n"):
+            line = ""
+            for separator, token in _break_tokens(paragraph):
+                candidate = line + separator + token if line else token
+                if not line or self.text_width(family, size, shape_text(candidate)) <= max_width:
+                    line = candidate
+                else:
+                    lines.append(line)
+                    line = token
+            if line:
+                lines.append(line)
+        return lines
+
+    def fit(self, text: str, box: Box, family: str, max_size: int) -> TextLayout:
+        """
+        Wrap text to the box's width at the largest size in [min_size, max_size]
+        whose lines fit the box's height. Text that does not fit even at
+        min_size is laid out at min_size and may run past the box's bottom.
+        """
+        width, height = max(1, box[2] - box[0]), max(1, box[3] - box[1])
+        key = (text, width, height, family, max_size)
+        with self._lock:
+            layout = self._layouts.get(key)
+            if layout is not None:
+                self._layouts.move_to_end(key)
+                return layout
+
+        def layout_at(size: int) -> TextLayout:
+            lines = self.wrap(text, family, size, width)
+            line_height = max(1, int(round(size * self.line_spacing)))
+            shaped = [shape_text(line) for line in lines]
+            return TextLayout(
+                lines=shaped, size=size, line_height=line_height,
+                width=int(max((self.text_width(family, size, line) for line in shaped), default=0)),
+                # No leading below the last line, so one line fits a box as tall as its text
+                height=line_height * max(0, len(shaped) - 1) + size, rtl=is_rtl(text),
+            )
+
+        # Binary search for the largest size whose wrapped text fits
+        low, high = self.min_size, max(self.min_size, max_size)
+        best = layout_at(low)
+        while low <= high:
+            size = (low + high) // 2
+            candidate = layout_at(size)
+            if candidate.height <= height and candidate.width <= width:
+                best, low = candidate, size + 1
+            else:
+                high = size - 1
+
+        with self._lock:
+            self._layouts[key] = best
+            while len(self._layouts) > self.max_layouts:
+                self._layouts.popitem(last=False)
+        return best
+
+    def draw(self, draw: ImageDraw.ImageDraw, layout: TextLayout, box: Box, family: str, fill: str):
+        font = self.fonts.get(family, layout.size)
+        y = box[1]
+        for line in layout.lines:
+            x = box[0]
+            if layout.rtl:
+                x = box[2] - int(self.text_width(family, layout.size, line))
+            draw.text((x, y), line, font=font, fill=fill)
+            y += layout.line_height
+
+
+@lru_cache(maxsize=1)
+def default_layout_engine() -> TextLayoutEngine:
+    """
+    Shared engine for the process, so every ImageProcessor reuses the same fonts.
+    """
+    return TextLayoutEngine.from_env()
@@ -0,0 +1,120 @@
+import time
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, List, Optional
+from models import Language
+from metrics import METRICS
+
+
+class TranslationBackend:
+    """
+    Interface for translation services used by ImageProcessor and BatchTranslator.
+    """
+    def translate(self, text: str, source_language: Language, target_language: Language) -> str:
+        raise NotImplementedError
+
+    def translate_segments(self, segments: List[str], source_language: Language,
+                           target_language: Language) -> List[str]:
+        """
+        Translate several segments (e.g. OCR blocks) into one language.
+        Backends that support bulk requests should override this.
+        """
+        return [self.translate(segment, source_language, target_language) for segment in segments]
+
+
+class GoogleTranslateBackend(TranslationBackend):
+    """
+    googletrans backend. The Translator's HTTP client is not shared across
+    threads, so each worker thread gets its own instance.
+    """
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def translator(self):
+        if not hasattr(self._local, "translator"):
+            from googletrans import Translator
+            self._local.translator = Translator()
+        return self._local.translator
+
+    def translate(self, text: str, source_language: Language, target_language: Language) -> str:
+        if not text.strip():
+            return ""
+        return self.translator.translate(text, src=source_language.value, dest=target_language.value).text
+
+    def translate_segments(self, segments: List[str], source_language: Language,
+                           target_language: Language) -> List[str]:
+        to_translate = [segment for segment in segments if segment.strip()]
+        if not to_translate:
+            return ["" for _ in segments]
+        results = iter(self.translator.translate(
+            to_translate, src=source_language.value, dest=target_language.value
+        ))
+        return [next(results).text if segment.strip() else "" for segment in segments]
+
+
+class FakeTranslationBackend(TranslationBackend):
+    """
+    Offline backend for tests and benchmarks. Returns "[<lang>] <text>" after
+    sleeping for the injected latency, and counts calls.
+    """
+    def __init__(self, latency: float = 0.0, translations: Optional[Dict[str, str]] = None):
+        self.latency = latency
+        self.translations = translations or {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def translate(self, text: str, source_language: Language, target_language: Language) -> str:
+        return self.translate_segments([text], source_language, target_language)[0]
+
+    def translate_segments(self, segments: List[str], source_language: Language,
+                           target_language: Language) -> List[str]:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [
+            self.translations.get(segment, f"[{target_language.value}] {segment}") if segment.strip() else ""
+            for segment in segments
+        ]
+
+
+class BatchTranslator:
+    """
+    Translates a list of segments into every target language concurrently.
+
+    One backend call is made per target language, with at most max_concurrency
+    in flight. Calls are dispatched through `dispatch` (an awaitable taking the
+    blocking function and its arguments), which defaults to the event loop's
+    executor; the agent passes its WorkerPool so translation timeouts and queue
+    depth apply.
+    """
+    def __init__(self, backend: TranslationBackend, max_concurrency: int = 6,
+                 dispatch: Optional[Callable[..., Awaitable]] = None):
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.dispatch = dispatch or self._run_in_executor
+
+    @staticmethod
+    async def _run_in_executor(fn: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def translate_batch(self, segments: List[str], source_language: Language,
+                              target_languages: List[Language]) -> Dict[Language, List[str]]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def translate_one(target_language: Language) -> List[str]:
+            if not any(segment.strip() for segment in segments):
+                return ["" for _ in segments]
+            async with semaphore:
+                try:
+                    with METRICS.time("translate_language_seconds", trace_stage=f"translate_{target_language.value}",
+                                      language=target_language.value):
+                        return await self.dispatch(
+                            self.backend.translate_segments, segments, source_language, target_language
+                        )
+                except Exception as e:
+                    raise Exception(f"Error translating text to {target_language.value}: {e}")
+
+        results = await asyncio.gather(*(translate_one(language) for language in target_languages))
+        return dict(zip(target_languages, results))
@@ -0,0 +1,189 @@
+import os
+import time
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from models import Language
+from translation import TranslationBackend
+
+MemoryKey = Tuple[str, str, str]  # (normalized text, source, target)
+
+TOUCH_FLUSH_SIZE = 1000  # Disk hits whose last_used update may wait for the next write
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form used as the cache key: NFKC, whitespace collapsed, trimmed.
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class TranslationMemory:
+    """
+    Translation cache keyed by (normalized text, source language, target language).
+
+    Lookups hit an in-process LRU first, then an SQLite table on disk that
+    survives restarts. Entries older than ttl_seconds are treated as misses.
+    Both tiers are capped; the disk tier evicts least recently used rows.
+    A disk hit does not write: its last_used time is kept in memory and
+    written along with the next put(), on close(), or once TOUCH_FLUSH_SIZE
+    hits have piled up.
+    """
+    def __init__(self, path: str = ":memory:", max_entries: int = 10000,
+                 max_disk_entries: int = 1000000, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[MemoryKey, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts_since_trim = 0
+        self._touched: Dict[MemoryKey, float] = {}  # last_used times not yet written
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS translation_memory ("
+            " text TEXT NOT NULL, source TEXT NOT NULL, target TEXT NOT NULL,"
+            " translation TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (text, source, target))"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS translation_memory_last_used ON translation_memory (last_used)"
+        )
+        self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> "TranslationMemory":
+        ttl = float(os.getenv("TRANSLATION_MEMORY_TTL_SECONDS", "2592000"))
+        return cls(
+            path=os.getenv("TRANSLATION_MEMORY_PATH", "translation_memory.sqlite3"),
+            max_entries=int(os.getenv("TRANSLATION_MEMORY_SIZE", "10000")),
+            max_disk_entries=int(os.getenv("TRANSLATION_MEMORY_DISK_SIZE", "1000000")),
+            ttl_seconds=ttl if ttl > 0 else None,
+        )
+
+    def _key(self, text: str, source_language: Language, target_language: Language) -> MemoryKey:
+        return (normalize_text(text), source_language.value, target_language.value)
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key: MemoryKey, translation: str, created_at: float):
+        self._lru[key] = (translation, created_at)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get(self, text: str, source_language: Language, target_language: Language) -> Optional[str]:
+        key = self._key(text, source_language, target_language)
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None and not self._expired(entry[1], now):
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            row = self._db.execute(
+                "SELECT translation, created_at FROM translation_memory"
+                " WHERE text = ? AND source = ? AND target = ?", key
+            ).fetchone()
+            if row is None or self._expired(row[1], now):
+                self._lru.pop(key, None)
+                self.misses += 1
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= TOUCH_FLUSH_SIZE:
+                self._flush_touched()
+                self._db.commit()
+            self._remember(key, row[0], row[1])
+            self.hits += 1
+            return row[0]
+
+    def put(self, text: str, source_language: Language, target_language: Language, translation: str):
+        key = self._key(text, source_language, target_language)
+        now = time.time()
+        with self._lock:
+            self._remember(key, translation, now)
+            self._touched.pop(key, None)
+            self._flush_touched()
+            self._db.execute(
+                "INSERT OR REPLACE INTO translation_memory"
+                " (text, source, target, translation, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                key + (translation, now, now)
+            )
+            self._puts_since_trim += 1
+            if self._puts_since_trim >= 1000:
+                self._trim_disk()
+            self._db.commit()
+
+    def _flush_touched(self):
+        if not self._touched:
+            return
+        self._db.executemany(
+            "UPDATE translation_memory SET last_used = ?"
+            " WHERE text = ? AND source = ? AND target = ?",
+            [(last_used,) + key for key, last_used in self._touched.items()]
+        )
+        self._touched.clear()
+
+    def _trim_disk(self):
+        self._puts_since_trim = 0
+        self._db.execute(
+            "DELETE FROM translation_memory WHERE rowid IN ("
+            " SELECT rowid FROM translation_memory ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        )
+        if self.ttl_seconds is not None:
+            self._db.execute(
+                "DELETE FROM translation_memory WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self._lru)}
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._db.commit()
+            self._db.close()
+
+
+class CachedTranslationBackend(TranslationBackend):
+    """
+    Wraps another backend with a TranslationMemory. Segments are looked up one
+    by one and only the misses are sent to the wrapped backend. Segments are
+    whole OCR blocks (see OCRAnalysis.segments), so a caption with one changed
+    block costs one block of translation; lines within a block are translated
+    together, since a sentence often wraps across them.
+    """
+    def __init__(self, backend: TranslationBackend, memory: TranslationMemory):
+        self.backend = backend
+        self.memory = memory
+
+    def translate(self, text: str, source_language: Language, target_language: Language) -> str:
+        return self.translate_segments([text], source_language, target_language)[0]
+
+    def translate_segments(self, segments: List[str], source_language: Language,
+                           target_language: Language) -> List[str]:
+        results: List[Optional[str]] = []
+        missing: List[int] = []
+        for i, segment in enumerate(segments):
+            if not segment.strip():
+                results.append("")
+                continue
+            cached = self.memory.get(segment, source_language, target_language)
+            results.append(cached)
+            if cached is None:
+                missing.append(i)
+        if missing:
+            translated = self.backend.translate_segments(
+                [segments[i] for i in missing], source_language, target_language
+            )
+            for i, translation in zip(missing, translated):
+                results[i] = translation
+                self.memory.put(segments[i], source_language, target_language, translation)
+        return results
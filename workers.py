@@ -0,0 +1,213 @@
+import os
+import time
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from metrics import METRICS, CURRENT_TRACE
+
+# Model states from worst to best, for reporting a pool of workers as one
+_MODEL_STATES = ("failed", "not_loaded", "loading", "ready")
+
+# Inpainting model held by each process-pool worker, loaded once by the initializer
+_WORKER_PROCESSOR = None
+
+
+class WorkerConfig:
+    """
+    Executor settings, read from the environment like AGENT_PORT.
+
+    queue_depth: jobs handed to the executors at once; further jobs wait their
+        turn. Rejecting work under load is left to the admission controller.
+    """
+    def __init__(self, threads: int, inpaint_workers: int, queue_depth: int,
+                 timeouts: Dict[str, float], translate_concurrency: int = 6,
+                 fork_after_load: bool = True):
+        self.threads = threads
+        self.fork_after_load = fork_after_load
+        self.translate_concurrency = translate_concurrency
+        self.inpaint_workers = inpaint_workers
+        self.queue_depth = queue_depth
+        self.timeouts = timeouts
+
+    @classmethod
+    def from_env(cls) -> "WorkerConfig":
+        return cls(
+            threads=int(os.getenv("WORKER_THREADS", str(min(32, (os.cpu_count() or 1) + 4)))),
+            inpaint_workers=int(os.getenv("INPAINT_WORKERS", "1")),
+            queue_depth=int(os.getenv("WORKER_QUEUE_DEPTH", "32")),
+            translate_concurrency=int(os.getenv("TRANSLATE_CONCURRENCY", "6")),
+            fork_after_load=os.getenv("INPAINT_FORK_AFTER_LOAD", "1") == "1",
+            timeouts={
+                "ocr": float(os.getenv("OCR_TIMEOUT_SECONDS", "60")),
+                "translate": float(os.getenv("TRANSLATE_TIMEOUT_SECONDS", "30")),
+                "inpaint": float(os.getenv("INPAINT_TIMEOUT_SECONDS", "300")),
+                "render": float(os.getenv("RENDER_TIMEOUT_SECONDS", "60")),
+            },
+        )
+
+
+def _init_inpaint_worker():
+    """
+    Process-pool initializer: make LaMa available once per worker process.
+    A worker forked after the parent loaded the model finds it already in the
+    registry and shares the weights copy-on-write.
+    """
+    global _WORKER_PROCESSOR
+    from Image_processor import ImageProcessor
+    from model_registry import MODEL_REGISTRY
+    MODEL_REGISTRY.get_or_none("lama")
+    _WORKER_PROCESSOR = ImageProcessor()
+
+
+def _worker_ready() -> Dict[str, Any]:
+    """
+    LaMa's status in this worker's own registry; the initializer has run by now.
+    """
+    from model_registry import MODEL_REGISTRY
+    return MODEL_REGISTRY.status()["lama"]
+
+
+def _inpaint_task(image, analysis):
+    return _WORKER_PROCESSOR.inpaint_background(image, analysis)
+
+
+def _timed_call(fn: Callable, *args):
+    # Runs on the worker; the wall-clock start tells the caller how long the job queued
+    return time.time(), fn(*args)
+
+
+def _profiled_call(trace, fn: Callable, *args):
+    return time.time(), trace.run_profiled(fn, *args)
+
+
+class WorkerPool:
+    """
+    Runs blocking pipeline stages off the agent event loop.
+
+    Translation, OCR and rendering go to a thread pool (they mostly wait on
+    subprocesses or the network). Inpainting goes to a process pool whose workers
+    each hold a preloaded LaMa model, so it uses all cores without holding the GIL.
+    With INPAINT_WORKERS=0 inpainting runs on the thread pool instead.
+
+    At most queue_depth jobs are submitted to the executors at a time; the
+    rest wait for a slot rather than fail, since they belong to requests that
+    admission has already accepted.
+
+    Every job records how long it queued and ran, per stage, in METRICS and in
+    the current request's trace; thread-pool jobs of a profiled request are
+    run under cProfile.
+
+    The process pool is started on first use or by start_inpainting(). With
+    fork_after_load (and a platform that can fork), the parent loads LaMa first
+    and the workers are forked from it, so they share one copy of the weights.
+    Either way the inpainting workers report their own LaMa status, which
+    model_status() returns in place of the parent's.
+    """
+    def __init__(self, config: Optional[WorkerConfig] = None):
+        self.config = config or WorkerConfig.from_env()
+        self.thread_pool = ThreadPoolExecutor(
+            max_workers=self.config.threads, thread_name_prefix="translator-worker"
+        )
+        self.uses_process_pool = self.config.inpaint_workers > 0
+        self.process_pool = None
+        self._process_pool_lock = asyncio.Lock()
+        self._worker_model_status: Optional[Dict[str, Any]] = None
+        self._slots = asyncio.Semaphore(max(1, self.config.queue_depth))
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run_thread(self, stage: str, fn: Callable, *args) -> Any:
+        return await self._run(self.thread_pool, stage, fn, *args)
+
+    async def run_process(self, stage: str, fn: Callable, *args) -> Any:
+        return await self._run(await self.start_inpainting(), stage, fn, *args)
+
+    async def start_inpainting(self) -> Optional[ProcessPoolExecutor]:
+        """
+        Load LaMa and start the inpainting workers, if not done already.
+        Call this in the background after startup to take the load off the first request.
+        """
+        loop = asyncio.get_running_loop()
+        if not self.uses_process_pool:
+            await self._warm("lama")
+            return None
+        async with self._process_pool_lock:
+            if self.process_pool is None:
+                context = None
+                if self.config.fork_after_load and "fork" in multiprocessing.get_all_start_methods():
+                    await self._warm("lama")
+                    context = multiprocessing.get_context("fork")
+                self.process_pool = ProcessPoolExecutor(
+                    max_workers=self.config.inpaint_workers, mp_context=context,
+                    initializer=_init_inpaint_worker
+                )
+                # Spawn every worker now rather than on the first inpaint, and keep the worst status
+                statuses = await asyncio.gather(*(
+                    loop.run_in_executor(self.process_pool, _worker_ready)
+                    for _ in range(self.config.inpaint_workers)
+                ))
+                self._worker_model_status = min(statuses, key=lambda status: _MODEL_STATES.index(status["state"]))
+        return self.process_pool
+
+    async def _warm(self, name: str):
+        # Load through the registry's background thread, so status() says "loading" meanwhile
+        from model_registry import MODEL_REGISTRY
+        await asyncio.get_running_loop().run_in_executor(None, MODEL_REGISTRY.warm(name).join)
+
+    def model_status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        MODEL_REGISTRY.status(), with LaMa as the inpainting workers report it
+        when they run it in their own processes.
+        """
+        from model_registry import MODEL_REGISTRY
+        status = MODEL_REGISTRY.status()
+        if self.uses_process_pool:
+            status["lama"] = self._worker_model_status or {
+                "state": "loading" if self._process_pool_lock.locked() else "not_loaded",
+                "load_seconds": None,
+                "error": None,
+            }
+        return status
+
+    async def inpaint(self, image_processor, image, analysis) -> Any:
+        """
+        Inpaint on the process pool if configured, else with the given processor on a thread.
+        """
+        if self.uses_process_pool:
+            return await self.run_process("inpaint", _inpaint_task, image, analysis)
+        return await self.run_thread("inpaint", image_processor.inpaint_background, image, analysis)
+
+    async def _run(self, executor, stage: str, fn: Callable, *args) -> Any:
+        trace = CURRENT_TRACE.get()
+        loop = asyncio.get_running_loop()
+        submitted = time.time()  # Queue wait includes the time spent waiting for a slot
+        self._pending += 1
+        try:
+            async with self._slots:
+                if trace is not None and trace.profile and executor is self.thread_pool:
+                    future = loop.run_in_executor(executor, _profiled_call, trace, fn, *args)
+                else:
+                    future = loop.run_in_executor(executor, _timed_call, fn, *args)
+                started, result = await asyncio.wait_for(future, timeout=self.config.timeouts.get(stage))
+        except asyncio.TimeoutError:
+            METRICS.inc("stage_timeouts_total", stage=stage)
+            raise Exception(f"Stage '{stage}' timed out after {self.config.timeouts.get(stage)}s")
+        finally:
+            self._pending -= 1
+        elapsed = time.time() - started
+        queue_wait = max(0.0, started - submitted)
+        METRICS.observe("stage_seconds", elapsed, stage=stage)
+        METRICS.observe("stage_queue_wait_seconds", queue_wait, stage=stage)
+        if trace is not None:
+            trace.add(stage, elapsed)
+            trace.add("queue_wait", queue_wait)
+        return result
+
+    def shutdown(self, wait: bool = True):
+        self.thread_pool.shutdown(wait=wait)
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=wait)